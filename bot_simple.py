@@ -7,10 +7,33 @@ import aiohttp
 import re
 from dotenv import load_dotenv
 import openai
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Awaitable, Callable, Iterable, Iterator, Tuple, Union
 import random
 import urllib.parse
 import html
+import sqlite3
+import sys
+import bz2
+import calendar
+import gzip
+import xml.etree.ElementTree as ElementTree
+from collections import Counter, OrderedDict, deque
+import json
+import mmap
+import struct
+import tempfile
+import zlib
+import codecs
+from html.parser import HTMLParser
+import time
+import contextvars
+from contextlib import asynccontextmanager
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library decoder is the fallback
+    orjson = None
 
 # Load environment variables
 load_dotenv()
@@ -25,9 +48,123 @@ DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 OSRS_WIKI_BASE_URL = os.getenv('OSRS_WIKI_BASE_URL', 'https://oldschool.runescape.wiki')
 
+# TextExtracts refuses exchars above this
+TEXT_EXTRACT_MAX_CHARS = 1200
+
+# Search request shapes: each command only asks for the results and fields it renders
+REQUEST_PROFILES = {
+    # /search shows three titles with snippets per page; a fourth says whether another page follows
+    'search': {'srlimit': 4, 'srprop': 'snippet', 'srinfo': ''},
+    # /info, /ai and the drop commands only read the best match's title
+    'lookup': {'srlimit': 1, 'srprop': '', 'srinfo': ''}
+}
+
+# Parser output we always throw away
+PARSE_TRIM_PARAMS = {'disablelimitreport': 1, 'disableeditsection': 1, 'disabletoc': 1}
+
+# Cached wiki data and rendered embeds (seconds, megabytes of encoded entries)
+SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', '600'))
+PAGE_CACHE_TTL = int(os.getenv('PAGE_CACHE_TTL', '900'))
+WIKI_CACHE_MAX_MB = float(os.getenv('WIKI_CACHE_MAX_MB', '32'))
+EMBED_CACHE_TTL = int(os.getenv('EMBED_CACHE_TTL', '3600'))
+EMBED_CACHE_MAX_MB = float(os.getenv('EMBED_CACHE_MAX_MB', '8'))
+CACHE_COMPRESS_MIN_BYTES = 1024  # Smaller entries are kept as plain JSON
+CACHE_ENTRY_OVERHEAD = 200  # Bytes of key, bookkeeping tuple and dict slot charged per entry
+# After wiki data expires: serve it while a background refresh runs, then only when the wiki fails
+WIKI_STALE_WHILE_REVALIDATE = int(os.getenv('WIKI_STALE_WHILE_REVALIDATE', '300'))
+WIKI_STALE_IF_ERROR = int(os.getenv('WIKI_STALE_IF_ERROR', '86400'))
+
+# Approximate tokens of wiki text sent with each /ai prompt
+AI_CONTEXT_TOKENS = int(os.getenv('AI_CONTEXT_TOKENS', '600'))
+
+# How long a handler waits for a (usually cached) answer before deferring the interaction
+FAST_REPLY_BUDGET = float(os.getenv('FAST_REPLY_BUDGET', '0.25'))
+
+# /search pages: results per page, and seconds the page buttons (and the pages they fetched) live
+SEARCH_PAGE_SIZE = 3
+SEARCH_VIEW_TIMEOUT = int(os.getenv('SEARCH_VIEW_TIMEOUT', '300'))
+
+# Total seconds each command may spend on the wiki and OpenAI before answering with what it has
+DEFAULT_COMMAND_DEADLINE = float(os.getenv('COMMAND_DEADLINE', '8'))
+COMMAND_DEADLINES = {
+    'ai': float(os.getenv('AI_COMMAND_DEADLINE', '20'))
+}
+
+# Circuit breakers for the wiki API and OpenAI: trip when this share of the recent
+# calls failed, then let one probe through every BREAKER_RESET_SECONDS
+BREAKER_FAILURE_RATE = float(os.getenv('BREAKER_FAILURE_RATE', '0.5'))
+BREAKER_WINDOW = int(os.getenv('BREAKER_WINDOW', '20'))  # Recent calls the failure rate is taken over
+BREAKER_MIN_CALLS = 5  # Don't judge an upstream on fewer calls than this
+BREAKER_RESET_SECONDS = float(os.getenv('BREAKER_RESET_SECONDS', '30'))
+# Seconds a single request may take before its upstream counts as failing (commands may give up sooner)
+WIKI_REQUEST_TIMEOUT = float(os.getenv('WIKI_REQUEST_TIMEOUT', '5'))
+OPENAI_REQUEST_TIMEOUT = float(os.getenv('OPENAI_REQUEST_TIMEOUT', '15'))
+
+# Priority lanes for upstream calls. Each lane has its own concurrency limit and fair queue,
+# with token buckets (calls per second, burst) that every guild and user draws from.
+# Cheap work (/help, /price, /droppedby, cached answers) never enters a lane.
+LANE_SETTINGS = {
+    # Wiki API requests, a few per command
+    'network': {
+        'concurrency': int(os.getenv('NETWORK_LANE_CONCURRENCY', '8')),
+        'guild_rate': 5.0, 'guild_burst': 20,
+        'user_rate': 2.0, 'user_burst': 10
+    },
+    # OpenAI completions, one per /ai and each holding its slot for seconds
+    'llm': {
+        'concurrency': int(os.getenv('LLM_LANE_CONCURRENCY', '2')),
+        'guild_rate': 0.5, 'guild_burst': 5,
+        'user_rate': 0.2, 'user_burst': 3
+    }
+}
+# Guilds that get more turns per round, as "guild_id:weight,guild_id:weight"
+SCHEDULER_GUILD_WEIGHTS = {
+    int(guild_id): int(weight)
+    for guild_id, weight in (pair.split(':') for pair in os.getenv('SCHEDULER_GUILD_WEIGHTS', '').split(',') if pair)
+}
+
+# Streaming page reads: chunk size, and how much display text the /drops fallback scans
+STREAM_CHUNK_SIZE = 16 * 1024
+DROPS_FALLBACK_CHARS = 4000
+
+# Local drop table store (backs /drops and /droppedby)
+DROPS_DB_PATH = os.getenv('DROPS_DB_PATH', 'drops.db')
+DROPS_MONSTER_CATEGORY = os.getenv('DROPS_MONSTER_CATEGORY', 'Category:Monsters')
+DROPS_REFRESH_INTERVAL = int(os.getenv('DROPS_REFRESH_INTERVAL', '21600'))  # Seconds between refresh passes, 0 disables
+DROPS_REFRESH_DELAY = float(os.getenv('DROPS_REFRESH_DELAY', '1.0'))  # Seconds between page fetches while refreshing
+
+# Local copy of main namespace pages, loaded from a MediaWiki XML dump
+# (`python bot_simple.py ingest <dump.xml.bz2>`)
+PAGE_STORE_PATH = os.getenv('PAGE_STORE_PATH', 'pages.db')
+DUMP_BATCH_SIZE = 500  # Pages per executemany
+DUMP_REPORT_EVERY = 10000  # Pages between throughput reports
+# Delta sync of the page store from list=recentchanges (`python bot_simple.py sync` runs one pass)
+PAGE_SYNC_INTERVAL = int(os.getenv('PAGE_SYNC_INTERVAL', '300'))  # Seconds between passes while the bot runs, 0 disables
+RECENT_CHANGES_MAX_AGE = 30 * 86400  # The wiki expires recent changes after about 30 days
+SEARCH_INDEX_MAX_SEGMENTS = 32  # Delta segments are merged by a rebuild past this many
+# Read-only plain text of every page in the page store, memory-mapped so bot processes share one copy
+PAGE_TEXT_PATH = os.getenv('PAGE_TEXT_PATH', 'page_text.bin')
+PAGE_TEXT_COMPRESS = os.getenv('PAGE_TEXT_COMPRESS', '1') != '0'  # zlib each page's text
+PAGE_TEXT_COMPRESS_MIN_CHARS = 256  # Shorter texts gain too little to be worth inflating
+PAGE_TEXT_MAX_AGE = int(os.getenv('PAGE_TEXT_MAX_AGE', '604800'))  # Seconds before the wiki API is asked instead
+PAGE_TEXT_PACK_INTERVAL = int(os.getenv('PAGE_TEXT_PACK_INTERVAL', '3600'))  # Least seconds between archive rewrites by syncs
+
+# Optional local full-text index that answers /search without the API
+# (build it with `python bot_simple.py build-index`)
+SEARCH_INDEX_PATH = os.getenv('SEARCH_INDEX_PATH', 'search_index')  # Directory of index segments
+SEARCH_INDEX_MAX_AGE = int(os.getenv('SEARCH_INDEX_MAX_AGE', '604800'))  # Older segments defer to the API
+
+# Grand Exchange prices from the wiki's real-time price API (backs /price)
+OSRS_PRICES_API_URL = os.getenv('OSRS_PRICES_API_URL', 'https://prices.runescape.wiki/api/v1/osrs')
+PRICES_USER_AGENT = os.getenv('PRICES_USER_AGENT', 'osrs-wiki-discord-bot (+https://github.com/big-ol-doggo/osrsbotwiki2)')
+PRICES_REFRESH_INTERVAL = int(os.getenv('PRICES_REFRESH_INTERVAL', '300'))  # Seconds between /latest snapshots
+PRICES_MAPPING_REFRESH_INTERVAL = 86400  # The item mapping changes with game updates only
+
 # Initialize OpenAI if API key is provided
+openai_client = None
 if OPENAI_API_KEY:
     openai.api_key = OPENAI_API_KEY
+    openai_client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
 
 def clean_html(html_content: str) -> str:
     """Clean HTML content and extract text"""
@@ -40,77 +177,1141 @@ def clean_html(html_content: str) -> str:
     text = text.strip()
     return text
 
+# Pieces of an action=parse (formatversion=2) body, matched as it streams in
+PARSE_TITLE_PATTERN = re.compile(r'"title"\s*:\s*("(?:[^"\\]|\\.)*")')
+PARSE_TEXT_START_PATTERN = re.compile(r'"text"\s*:\s*"')
+# The longest run of complete JSON string tokens; a lone high surrogate waits for its pair
+JSON_STRING_BODY_PATTERN = re.compile(
+    r'(?:[^"\\]+'
+    r'|\\u[dD][89abAB][0-9a-fA-F]{2}\\u[0-9a-fA-F]{4}'
+    r'|\\u(?![dD][89abAB])[0-9a-fA-F]{4}'
+    r'|\\["\\/bfnrt])*'
+)
+
+class StreamingPageTextExtractor(HTMLParser):
+    """Pull display text out of an action=parse JSON body as it arrives"""
+
+    SKIP_TAGS = {'style', 'script'}
+
+    def __init__(self, max_chars: int):
+        super().__init__()
+        self.max_chars = max_chars
+        self.buffer = ''
+        self.title = None
+        self.in_text = False
+        self.finished = False
+        self.skip_depth = 0
+        self.parts = []
+        self.length = 0
+
+    def feed_json(self, chunk: str) -> bool:
+        """Feed the next piece of the JSON body; True once enough text was extracted"""
+        self.buffer += chunk
+
+        if not self.in_text:
+            start = PARSE_TEXT_START_PATTERN.search(self.buffer)
+            if not start:
+                return False
+            title_match = PARSE_TITLE_PATTERN.search(self.buffer, 0, start.start())
+            if title_match:
+                self.title = json.loads(title_match.group(1))
+            self.buffer = self.buffer[start.end():]
+            self.in_text = True
+
+        # Decode every complete token of the HTML string and hold back a split escape
+        body = JSON_STRING_BODY_PATTERN.match(self.buffer)
+        piece = self.buffer[:body.end()]
+        ended = self.buffer[body.end():body.end() + 1] == '"'
+        self.buffer = self.buffer[body.end():]
+
+        if piece:
+            self.feed(json.loads('"' + piece + '"'))
+        if ended:
+            self.close()
+            self.finished = True
+
+        return self.finished or self.length >= self.max_chars
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+            self.length += len(data)
+
+    def text(self) -> str:
+        """The display text extracted so far, whitespace collapsed like clean_html"""
+        return re.sub(r'\s+', ' ', ''.join(self.parts)).strip()
+
+class TTLCache:
+    """LRU cache of JSON values whose entries expire a fixed time after they were stored
+
+    Values are kept encoded (zlib-compressed past CACHE_COMPRESS_MIN_BYTES), so
+    the cache knows its real size and evicts by bytes rather than entry count.
+    Each read decodes a fresh copy. Expired entries are kept for another
+    stale_ttl seconds so callers can still fall back to them through lookup().
+    """
+
+    def __init__(self, ttl: float, max_bytes: int, stale_ttl: float = 0):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stale_ttl = stale_ttl
+        self.entries: OrderedDict = OrderedDict()
+        self.bytes = 0
+        # Encoded size of everything stored, before compression, for the compression ratio
+        self.raw_bytes = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Get a live entry, or None"""
+        value, expired_for = self.lookup(key)
+        return value if expired_for == 0 else None
+
+    def lookup(self, key: Any) -> Tuple[Optional[Any], float]:
+        """Get (value, seconds since it expired), where 0 means the entry is still live"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None, 0.0
+        expires_at, payload, compressed, raw_size = entry
+        expired_for = max(0.0, time.monotonic() - expires_at)
+        if expired_for > self.stale_ttl:
+            self.discard(key)
+            return None, 0.0
+        self.entries.move_to_end(key)
+        return json.loads(zlib.decompress(payload) if compressed else payload), expired_for
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None):
+        """Store an entry, evicting the least recently used ones while over the byte limit"""
+        payload = orjson.dumps(value) if orjson is not None else json.dumps(value, separators=(',', ':')).encode('utf-8')
+        raw_size = len(payload)
+        compressed = raw_size >= CACHE_COMPRESS_MIN_BYTES
+        if compressed:
+            payload = zlib.compress(payload, 1)
+
+        self.discard(key)
+        self.entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), payload, compressed, raw_size)
+        self.bytes += len(payload) + CACHE_ENTRY_OVERHEAD
+        self.raw_bytes += raw_size + CACHE_ENTRY_OVERHEAD
+        while self.bytes > self.max_bytes and self.entries:
+            self.discard(next(iter(self.entries)))
+
+    def discard(self, key: Any):
+        """Drop an entry, if present, and its bytes"""
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry[1]) + CACHE_ENTRY_OVERHEAD
+            self.raw_bytes -= entry[3] + CACHE_ENTRY_OVERHEAD
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+def canonical_input(text: str) -> str:
+    """Normalize user input so "Abyssal  Whip" and "abyssal whip" share cache entries"""
+    return ' '.join(text.lower().split())
+
+class Deadline:
+    """Time budget for one interaction, shared by every request it makes"""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+        # Set when an answer had to come from expired cache data because the wiki failed
+        self.stale = False
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+# Each interaction runs in its own task, so a deadline set by a handler stays local to it
+current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar('current_deadline', default=None)
+# (guild, user) the running command's upstream calls are queued and rate limited under
+BACKGROUND_REQUESTER = ('background', 0)
+# Refreshes of expired entries users are waiting to see get buckets of their own, so bulk
+# background crawls can't starve them (user buckets are keyed by user id alone)
+REVALIDATE_REQUESTER = ('revalidate', -1)
+current_requester: contextvars.ContextVar[Tuple[Any, int]] = contextvars.ContextVar('current_requester', default=BACKGROUND_REQUESTER)
+
+def start_deadline(interaction: discord.Interaction, command: str) -> Deadline:
+    """Give the running command its budget from COMMAND_DEADLINES and record who it is for"""
+    deadline = Deadline(COMMAND_DEADLINES.get(command, DEFAULT_COMMAND_DEADLINE))
+    current_deadline.set(deadline)
+    # Direct messages have no guild, so each DM user queues on their own
+    guild = interaction.guild_id if interaction.guild_id is not None else f"dm:{interaction.user.id}"
+    current_requester.set((guild, interaction.user.id))
+    return deadline
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left for the running command, or None outside of one (background tasks)"""
+    deadline = current_deadline.get()
+    if deadline is None:
+        return None
+    if deadline.expired:
+        raise asyncio.TimeoutError("command deadline exceeded")
+    return deadline.remaining()
+
+def deadline_expired() -> bool:
+    """Whether the running command has used up its budget"""
+    deadline = current_deadline.get()
+    return deadline is not None and deadline.expired
+
+def mark_stale():
+    """Record that the running command is answering from expired wiki data"""
+    deadline = current_deadline.get()
+    if deadline is not None:
+        deadline.stale = True
+
+def mark_if_stale(embed: discord.Embed) -> bool:
+    """Say so in the footer when the embed was built from expired wiki data"""
+    deadline = current_deadline.get()
+    if deadline is None or not deadline.stale:
+        return False
+    footer = embed.footer.text
+    notice = "⚠️ The wiki is unavailable, showing saved data"
+    embed.set_footer(text=f"{footer} • {notice}" if footer else notice)
+    return True
+
+def lane_turn(lane: str):
+    """Queue the running command's upstream call in a priority lane, within its deadline"""
+    guild, user = current_requester.get()
+    return LANES[lane].turn(guild, user, remaining_budget())
+
+def request_limit(upstream_limit: float) -> Tuple[float, bool]:
+    """Timeout for one upstream request, and whether the command's budget (rather than
+    the upstream's own limit) set it; raises if the budget is already spent"""
+    budget = remaining_budget()
+    if budget is None or budget >= upstream_limit:
+        return upstream_limit, False
+    return budget, True
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open"""
+
+class CircuitBreaker:
+    """Fail fast while an upstream keeps failing, probing it once in a while to see if it recovered
+
+    closed: calls go through and their outcomes are recorded.
+    open: calls raise CircuitOpenError without touching the network.
+    half_open: after reset_seconds one probe call is let through; it closes
+    the breaker when it succeeds and reopens it when it fails.
+    """
+
+    def __init__(self, name: str, failure_rate: float = BREAKER_FAILURE_RATE, window: int = BREAKER_WINDOW,
+                 min_calls: int = BREAKER_MIN_CALLS, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.reset_seconds = reset_seconds
+        self.outcomes: deque = deque(maxlen=window)  # True for each recent failure
+        self.state = 'closed'
+        self.opened_at = 0.0
+        self.probing = False
+        self.rejected = 0
+
+    def is_open(self) -> bool:
+        """Whether calls are currently being refused (a pending probe counts as open)"""
+        return self.state != 'closed'
+
+    def check(self):
+        """Raise CircuitOpenError unless a call may go through now"""
+        if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = 'half_open'
+        if self.state == 'closed' or (self.state == 'half_open' and not self.probing):
+            self.probing = self.state == 'half_open'
+            return
+        self.rejected += 1
+        raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def record(self, failed: bool):
+        """Record a call's outcome and move between states"""
+        if self.state == 'half_open':
+            self.probing = False
+            if failed:
+                self.trip()
+            else:
+                print(f"{self.name} circuit closed")
+                self.state = 'closed'
+                self.outcomes.clear()
+            return
+
+        self.outcomes.append(failed)
+        if self.state == 'closed' and len(self.outcomes) >= self.min_calls \
+                and sum(self.outcomes) / len(self.outcomes) >= self.failure_rate:
+            self.trip()
+
+    def trip(self):
+        print(f"{self.name} circuit opened")
+        self.state = 'open'
+        self.opened_at = time.monotonic()
+
+    async def call(self, make_call: Callable[[], Awaitable[Any]], deadline_bound: bool = False) -> Any:
+        """Run one upstream call through the breaker
+
+        deadline_bound says the call's timeout came from the command's remaining
+        budget, so timing out only means the command ran out of time.
+        """
+        self.check()
+        try:
+            result = await make_call()
+        except asyncio.CancelledError:
+            # Cancelled by our own caller, which says nothing about the upstream
+            self.probing = False
+            raise
+        except asyncio.TimeoutError:
+            if deadline_bound:
+                self.probing = False
+                raise
+            self.record(True)
+            raise
+        except Exception:
+            self.record(True)
+            raise
+        self.record(False)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state for /status"""
+        return {
+            'state': self.state,
+            'failures': sum(self.outcomes),
+            'calls': len(self.outcomes),
+            'rejected': self.rejected,
+            'retry_in': max(0.0, self.opened_at + self.reset_seconds - time.monotonic()) if self.state == 'open' else 0.0
+        }
+
+class TokenBucket:
+    """Allows `rate` events per second on average, with bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def ready(self) -> bool:
+        self.refill()
+        return self.tokens >= 1
+
+    def take(self):
+        self.tokens -= 1
+
+    def wait_time(self) -> float:
+        """Seconds until the next token"""
+        self.refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def full(self) -> bool:
+        self.refill()
+        return self.tokens >= self.burst
+
+class FairScheduler:
+    """Runs upstream calls a few at a time, taking turns between guilds
+
+    Every guild has its own FIFO queue, and free slots go round-robin over the
+    guilds with waiting calls; a guild with weight N gets N turns in a row.
+    A call is only started while both its guild's and its user's token
+    buckets have a token, so one busy guild or user only slows itself down.
+    """
+
+    def __init__(self, concurrency: int, guild_rate: float, guild_burst: float,
+                 user_rate: float, user_burst: float, weights: Optional[Dict[Any, int]] = None):
+        self.concurrency = concurrency
+        self.guild_rate, self.guild_burst = guild_rate, guild_burst
+        self.user_rate, self.user_burst = user_rate, user_burst
+        self.weights = weights or {}
+        self.running = 0
+        # Guild -> waiting (user, future) pairs; the dict order is the round-robin order
+        self.queues: OrderedDict = OrderedDict()
+        self.turns_left: Dict[Any, int] = {}
+        self.guild_buckets: Dict[Any, TokenBucket] = {}
+        self.user_buckets: Dict[int, TokenBucket] = {}
+        self.retry_handle: Optional[asyncio.TimerHandle] = None
+
+    @asynccontextmanager
+    async def turn(self, guild: Any, user: int, timeout: Optional[float] = None):
+        """Wait (up to timeout) for a turn and hold a slot while the block runs"""
+        await asyncio.wait_for(self.acquire(guild, user), timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, guild: Any, user: int):
+        future = asyncio.get_running_loop().create_future()
+        entry = (user, future)
+        self.queues.setdefault(guild, deque()).append(entry)
+        self.dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Our turn came just as the command was cancelled
+                self.release()
+            elif guild in self.queues and entry in self.queues[guild]:
+                self.queues[guild].remove(entry)
+                if not self.queues[guild]:
+                    del self.queues[guild]
+            raise
+
+    def release(self):
+        self.running -= 1
+        self.dispatch()
+
+    def dispatch(self):
+        """Start waiting commands while there are free slots and tokens"""
+        while self.running < self.concurrency:
+            entry = self.next_entry()
+            if entry is None:
+                break
+            self.running += 1
+            entry[1].set_result(None)
+
+        # Commands held back by empty buckets are retried once a token comes in
+        if self.queues and self.running < self.concurrency and self.retry_handle is None:
+            self.retry_handle = asyncio.get_running_loop().call_later(self.next_token_in(), self.retry)
+
+    def retry(self):
+        self.retry_handle = None
+        self.dispatch()
+
+    def next_entry(self) -> Optional[Tuple[int, asyncio.Future]]:
+        """Pop the next command in weighted round-robin order, skipping guilds out of tokens"""
+        for _ in range(len(self.queues)):
+            guild, queue = next(iter(self.queues.items()))
+            entry = self.take_eligible(guild, queue)
+            if entry is None and not queue:
+                # Every waiter had been cancelled
+                del self.queues[guild]
+                self.turns_left.pop(guild, None)
+                continue
+            if entry is None:
+                # No token for this guild (or any of its users) yet, so it loses its turn
+                self.turns_left.pop(guild, None)
+                self.queues.move_to_end(guild)
+                continue
+
+            turns = self.turns_left.get(guild, self.weights.get(guild, 1)) - 1
+            if not queue:
+                del self.queues[guild]
+                self.turns_left.pop(guild, None)
+            elif turns > 0:
+                self.turns_left[guild] = turns
+            else:
+                self.turns_left.pop(guild, None)
+                self.queues.move_to_end(guild)
+            return entry
+        return None
+
+    def take_eligible(self, guild: Any, queue: deque) -> Optional[Tuple[int, asyncio.Future]]:
+        """Remove and return the oldest command in the guild whose user has a token"""
+        # Waiters cancelled (e.g. by wait_for in turn()) before their cleanup ran must not get a slot
+        for entry in [entry for entry in queue if entry[1].done()]:
+            queue.remove(entry)
+        if not queue:
+            return None
+        guild_bucket = self.bucket(self.guild_buckets, guild, self.guild_rate, self.guild_burst)
+        if not guild_bucket.ready():
+            return None
+        for entry in queue:
+            user_bucket = self.bucket(self.user_buckets, entry[0], self.user_rate, self.user_burst)
+            if user_bucket.ready():
+                queue.remove(entry)
+                guild_bucket.take()
+                user_bucket.take()
+                return entry
+        return None
+
+    def bucket(self, buckets: Dict[Any, TokenBucket], key: Any, rate: float, burst: float) -> TokenBucket:
+        if key not in buckets:
+            # A full bucket behaves like a new one, so idle ones can go
+            if len(buckets) >= 4096:
+                for idle in [k for k, b in buckets.items() if b.full()]:
+                    del buckets[idle]
+            buckets[key] = TokenBucket(rate, burst)
+        return buckets[key]
+
+    def next_token_in(self) -> float:
+        """Seconds until some waiting command could have the tokens it needs"""
+        waits = []
+        for guild, queue in self.queues.items():
+            guild_wait = self.bucket(self.guild_buckets, guild, self.guild_rate, self.guild_burst).wait_time()
+            user_wait = min(self.bucket(self.user_buckets, user, self.user_rate, self.user_burst).wait_time()
+                            for user, _ in queue)
+            waits.append(max(guild_wait, user_wait))
+        return min(waits, default=0.0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Queue depth for /status"""
+        busiest = sorted(self.queues.items(), key=lambda item: len(item[1]), reverse=True)[:3]
+        return {
+            'running': self.running,
+            'concurrency': self.concurrency,
+            'queued': sum(len(queue) for queue in self.queues.values()),
+            'busiest': [(guild, len(queue)) for guild, queue in busiest]
+        }
+
+class EmbedCache:
+    """Serialized embeds keyed by (command, canonical input, page revid)"""
+
+    def __init__(self, ttl: float = EMBED_CACHE_TTL, max_bytes: int = int(EMBED_CACHE_MAX_MB * 1024 * 1024)):
+        self.cache = TTLCache(ttl, max_bytes)
+
+    def get(self, command: str, key: str, revid: Optional[int] = None) -> Optional[discord.Embed]:
+        """Rebuild a cached embed from its payload, or None on a miss"""
+        payload = self.cache.get((command, key, revid))
+        return discord.Embed.from_dict(payload) if payload else None
+
+    def set(self, command: str, key: str, embed: discord.Embed, revid: Optional[int] = None,
+            ttl: Optional[float] = None):
+        """Store the serialized payload of a fully built embed"""
+        self.cache.set((command, key, revid), embed.to_dict(), ttl)
+
+def stdlib_json_decoder(body: bytes) -> Any:
+    """Decode a JSON response body with the standard library"""
+    return json.loads(body)
+
+def orjson_decoder(body: bytes) -> Any:
+    """Decode a JSON response body with orjson"""
+    return orjson.loads(body)
+
+def default_json_decoder() -> Callable[[bytes], Any]:
+    """Pick the fastest JSON decoder that is installed"""
+    return orjson_decoder if orjson is not None else stdlib_json_decoder
+
+class TitleTable:
+    """Interns page titles to small integer ids, so records share one copy of each title"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.titles: List[str] = []
+
+    def intern(self, title: str) -> int:
+        title_id = self.ids.get(title)
+        if title_id is None:
+            title_id = self.ids[title] = len(self.titles)
+            self.titles.append(title)
+        return title_id
+
+    def __getitem__(self, title_id: int) -> str:
+        return self.titles[title_id]
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+# Every page title the bot has seen, bounded by the size of the wiki
+title_table = TitleTable()
+
+class Record:
+    """Base of the slotted records below; caches keep them as rows (lists in __slots__ order)"""
+    __slots__ = ()
+
+    def to_row(self) -> List[Any]:
+        return [getattr(self, name) for name in self.__slots__]
+
+    @classmethod
+    def from_row(cls, row: List[Any]) -> 'Record':
+        record = cls.__new__(cls)
+        for name, value in zip(cls.__slots__, row):
+            setattr(record, name, value)
+        return record
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+class SearchHit(Record):
+    """A search result: the page and its highlighted snippet"""
+    __slots__ = ('title_id', 'snippet')
+
+    def __init__(self, title: str, snippet: str = ''):
+        self.title_id = title_table.intern(title)
+        self.snippet = snippet
+
+    @property
+    def title(self) -> str:
+        return title_table[self.title_id]
+
+class PageSummary(Record):
+    """Display text of a page (or its introduction), its revision and, from action=parse, its sections"""
+    __slots__ = ('title_id', 'content', 'revid', 'sections')
+
+    def __init__(self, title: str, content: str, revid: Optional[int] = None,
+                 sections: Optional[List[Dict[str, Any]]] = None):
+        self.title_id = title_table.intern(title)
+        self.content = content
+        self.revid = revid
+        self.sections = sections or []
+
+    @property
+    def title(self) -> str:
+        return title_table[self.title_id]
+
+def trim_sections(sections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep just the heading and index of action=parse sections, the only fields read"""
+    return [{'line': section.get('line', ''), 'index': section.get('index', '')} for section in sections]
+
+class RecentChange(Record):
+    """A /recent entry: the page, its editor and the edit summary"""
+    __slots__ = ('title_id', 'user', 'comment')
+
+    def __init__(self, title: str, user: str, comment: str):
+        self.title_id = title_table.intern(title)
+        self.user = user
+        self.comment = comment
+
+    @property
+    def title(self) -> str:
+        return title_table[self.title_id]
+
+class DropRow(Record):
+    """One line of a monster's drop table; rate is None when the rarity isn't a number"""
+    __slots__ = ('item_id', 'quantity', 'rarity', 'rate', 'category')
+
+    def __init__(self, item: str, quantity: str, rarity: str, rate: Optional[float], category: str):
+        self.item_id = title_table.intern(item)
+        # The same few quantities, rarities and categories recur across every table
+        self.quantity = sys.intern(quantity)
+        self.rarity = sys.intern(rarity)
+        self.rate = rate
+        self.category = sys.intern(category)
+
+    @property
+    def item(self) -> str:
+        return title_table[self.item_id]
+
 class OSRSWikiSearcher:
-    def __init__(self, base_url: str = OSRS_WIKI_BASE_URL):
+    def __init__(self, base_url: str = OSRS_WIKI_BASE_URL,
+                 decoder: Optional[Callable[[bytes], Any]] = None,
+                 index: Optional['SearchIndex'] = None,
+                 texts: Optional['PageTextArchive'] = None):
         self.base_url = base_url
+        # Answers /search in-process when it has fresh hits
+        self.index = index
+        # Full page texts shared with other bot processes, read before the API (and its cache)
+        self.texts = texts
         self.session = None
+        self.decoder = decoder or default_json_decoder()
+        # Bytes received per call site, to see what each command actually costs
+        self.payload_stats: Dict[str, Dict[str, float]] = {}
+        # Search results and page data, so repeated lookups skip the network
+        self.cache = TTLCache(PAGE_CACHE_TTL, int(WIKI_CACHE_MAX_MB * 1024 * 1024),
+                              stale_ttl=max(WIKI_STALE_WHILE_REVALIDATE, WIKI_STALE_IF_ERROR))
+        # Background refreshes of expired entries, one per key
+        self.revalidating: Dict[Tuple, asyncio.Task] = {}
+        # Stops commands from queueing on api.php while it is down
+        self.breaker = CircuitBreaker('Wiki API')
     
     async def get_session(self):
         if self.session is None:
             self.session = aiohttp.ClientSession()
         return self.session
-    
-    async def search_wiki(self, query: str) -> List[Dict[str, Any]]:
-        """Search the OSRS Wiki for the given query"""
+
+    async def api_get(self, params: Dict[str, Any], call_site: str) -> Optional[Any]:
+        """GET api.php and decode the JSON body, recording its size under call_site"""
         session = await self.get_session()
-        
-        # Construct search URL
-        search_url = f"{self.base_url}/api.php"
+
+        async def get() -> Optional[bytes]:
+            timeout = aiohttp.ClientTimeout(total=limit)
+            async with session.get(f"{self.base_url}/api.php", params=params, timeout=timeout) as response:
+                # Server errors count against the breaker, missing pages and bad requests don't
+                if response.status >= 500:
+                    response.raise_for_status()
+                if response.status != 200:
+                    return None
+                return await response.read()
+
+        try:
+            async with lane_turn('network'):
+                # After the lane wait, which spends the command's budget too
+                limit, deadline_bound = request_limit(WIKI_REQUEST_TIMEOUT)
+                body = await self.breaker.call(get, deadline_bound)
+        except asyncio.TimeoutError:
+            raise asyncio.TimeoutError(f"{call_site} request timed out")
+        if body is None:
+            return None
+
+        started = time.perf_counter()
+        data = self.decoder(body)
+        self.record_payload(call_site, len(body), time.perf_counter() - started)
+        return data
+
+    async def cached(self, key: Tuple, ttl: float, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return a cached result for key, or fetch and cache it (empty results aren't cached)
+
+        Recently expired results are returned at once while a background task
+        refreshes them. Older ones are refetched, but still returned (and the
+        command marked stale) when the fetch comes back empty.
+        """
+        value, expired_for = self.cache.lookup(key)
+        if value is not None:
+            if expired_for == 0:
+                return value
+            if expired_for <= WIKI_STALE_WHILE_REVALIDATE:
+                self.revalidate(key, ttl, fetch)
+                return value
+
+        fresh = await fetch()
+        if fresh:
+            self.cache.set(key, fresh, ttl)
+            return fresh
+        if value is not None:
+            # Fetchers swallow errors and timeouts, so an old answer beats "not found"
+            mark_stale()
+            return value
+        return fresh
+
+    async def cached_records(self, key: Tuple, ttl: float, record: type,
+                             fetch: Callable[[], Awaitable[List[Record]]]) -> List[Record]:
+        """cached() for a list of records, which the cache keeps as rows"""
+        async def fetch_rows():
+            return [item.to_row() for item in await fetch()]
+        return [record.from_row(row) for row in await self.cached(key, ttl, fetch_rows)]
+
+    async def cached_record(self, key: Tuple, ttl: float, record: type,
+                            fetch: Callable[[], Awaitable[Optional[Record]]]) -> Optional[Record]:
+        """cached() for a single record, or None"""
+        async def fetch_one():
+            value = await fetch()
+            return [value] if value else []
+        records = await self.cached_records(key, ttl, record, fetch_one)
+        return records[0] if records else None
+
+    def revalidate(self, key: Tuple, ttl: float, fetch: Callable[[], Awaitable[Any]]):
+        """Refresh an expired entry in the background unless a refresh is already running"""
+        if key not in self.revalidating:
+            self.revalidating[key] = asyncio.create_task(self._revalidate(key, ttl, fetch))
+
+    async def _revalidate(self, key: Tuple, ttl: float, fetch: Callable[[], Awaitable[Any]]):
+        # The refresh outlives the command that noticed the entry, so it isn't bound by its
+        # deadline or charged to its guild
+        current_deadline.set(None)
+        current_requester.set(REVALIDATE_REQUESTER)
+        try:
+            value = await fetch()
+            if value:
+                self.cache.set(key, value, ttl)
+        finally:
+            del self.revalidating[key]
+
+    def record_payload(self, call_site: str, size: int, decode_seconds: float):
+        """Accumulate payload bytes and JSON decode time for a call site"""
+        stats = self.payload_stats.setdefault(call_site, {'calls': 0, 'bytes': 0, 'decode_seconds': 0.0})
+        stats['calls'] += 1
+        stats['bytes'] += size
+        stats['decode_seconds'] += decode_seconds
+    
+    async def search_wiki(self, query: str, profile: str = 'search', offset: int = 0) -> List[SearchHit]:
+        """Search the OSRS Wiki for the given query, shaped by a REQUEST_PROFILES entry,
+        skipping the first offset results"""
+        # /search results come from the local index when it has fresh hits; lookups keep
+        # the wiki's own ranking for picking the one best page
+        if self.index is not None and profile == 'search':
+            try:
+                hits = self.index.search(query, offset + REQUEST_PROFILES[profile]['srlimit'])
+            except Exception as e:
+                print(f"Error searching the local index: {e}")
+                hits = None
+            if hits:
+                return hits[offset:]
+
+        return await self.cached_records(
+            ('search', canonical_input(query), profile, offset), SEARCH_CACHE_TTL, SearchHit,
+            lambda: self._fetch_search(query, profile, offset)
+        )
+
+    async def _fetch_search(self, query: str, profile: str, offset: int) -> List[SearchHit]:
         params = {
             'action': 'query',
             'format': 'json',
             'list': 'search',
             'srsearch': query,
-            'srlimit': 5,  # Limit to 5 results
             'srnamespace': 0  # Main namespace only
         }
+        params.update(REQUEST_PROFILES[profile])
+        if offset:
+            params['sroffset'] = offset
         
         try:
-            async with session.get(search_url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get('query', {}).get('search', [])
-                else:
-                    return []
+            data = await self.api_get(params, f"search:{profile}")
+            results = data.get('query', {}).get('search', []) if data else []
+            return [SearchHit(result['title'], result.get('snippet', '')) for result in results]
         except Exception as e:
             print(f"Error searching wiki: {e}")
             return []
     
-    async def get_page_content(self, page_title: str) -> Optional[Dict[str, Any]]:
-        """Get the content of a specific wiki page"""
-        session = await self.get_session()
-        
+    async def get_page_content(self, page_title: str, mode: str = 'html',
+                               chars: Optional[int] = None) -> Optional[PageSummary]:
+        """Get the content of a specific wiki page
+
+        mode='html' renders the introduction with action=parse and returns its
+        display text (the HTML is dropped before caching) plus the section list;
+        mode='text' returns a plain-text introduction extract and no sections;
+        mode='stream' streams the rendered introduction and returns its display
+        text, stopping the download once `chars` characters have been extracted.
+        """
+        if mode == 'text':
+            return await self.get_page_extract(page_title, chars)
+        if mode == 'stream':
+            return await self.stream_page_text(page_title, chars or TEXT_EXTRACT_MAX_CHARS)
+
+        return await self.cached_record(
+            ('html', page_title), PAGE_CACHE_TTL, PageSummary, lambda: self._fetch_page_html(page_title)
+        )
+
+    async def _fetch_page_html(self, page_title: str) -> Optional[PageSummary]:
         # Get page content
-        content_url = f"{self.base_url}/api.php"
         params = {
             'action': 'parse',
             'format': 'json',
             'page': page_title,
-            'prop': 'text|sections',
+            'prop': 'text|sections|revid',
             'section': 0  # Get the introduction section
         }
+        params.update(PARSE_TRIM_PARAMS)
         
         try:
-            async with session.get(content_url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if 'parse' in data:
-                        return {
-                            'title': data['parse']['title'],
-                            'content': data['parse']['text']['*'],
-                            'sections': data['parse'].get('sections', [])
-                        }
-                return None
+            data = await self.api_get(params, 'page_html')
+            if data and 'parse' in data:
+                return PageSummary(
+                    data['parse']['title'],
+                    clean_html(data['parse']['text']['*']),
+                    data['parse'].get('revid'),
+                    trim_sections(data['parse'].get('sections', []))
+                )
+            return None
         except Exception as e:
             print(f"Error getting page content: {e}")
             return None
-    
+
+    async def get_page_extract(self, page_title: str, chars: Optional[int] = None) -> Optional[PageSummary]:
+        """Get a plain-text extract of a page's introduction, cut server side"""
+        return await self.cached_record(
+            ('extract', page_title, chars), PAGE_CACHE_TTL, PageSummary,
+            lambda: self._fetch_page_extract(page_title, chars)
+        )
+
+    async def _fetch_page_extract(self, page_title: str, chars: Optional[int]) -> Optional[PageSummary]:
+        params = {
+            'action': 'query',
+            'format': 'json',
+            'prop': 'extracts|info',  # info carries the lastrevid
+            'titles': page_title,
+            'exintro': 1,
+            'explaintext': 1,
+            'redirects': 1
+        }
+        # The API caps exchars; longer requests just get the whole introduction
+        if chars is not None and chars <= TEXT_EXTRACT_MAX_CHARS:
+            params['exchars'] = chars
+
+        try:
+            data = await self.api_get(params, 'page_text')
+            for page in (data or {}).get('query', {}).get('pages', {}).values():
+                if 'extract' in page:
+                    return PageSummary(page['title'], page['extract'].strip(), page.get('lastrevid'))
+            return None
+        except Exception as e:
+            print(f"Error getting page extract: {e}")
+            return None
+
+    async def get_page_fulltext(self, page_title: str) -> Optional[PageSummary]:
+        """Get the plain text of a whole page, with "== Heading ==" lines between sections"""
+        if self.texts is not None:
+            local = self.texts.get(page_title)
+            if local:
+                return local
+        return await self.cached_record(
+            ('fulltext', page_title), PAGE_CACHE_TTL, PageSummary,
+            lambda: self._fetch_page_fulltext(page_title)
+        )
+
+    async def _fetch_page_fulltext(self, page_title: str) -> Optional[PageSummary]:
+        params = {
+            'action': 'query',
+            'format': 'json',
+            'prop': 'extracts|info',
+            'titles': page_title,
+            'explaintext': 1,
+            'exsectionformat': 'wiki',
+            'redirects': 1
+        }
+
+        try:
+            data = await self.api_get(params, 'page_fulltext')
+            for page in (data or {}).get('query', {}).get('pages', {}).values():
+                if 'extract' in page:
+                    return PageSummary(page['title'], page['extract'].strip(), page.get('lastrevid'))
+            return None
+        except Exception as e:
+            print(f"Error getting page text: {e}")
+            return None
+
+    async def stream_page_text(self, page_title: str, max_chars: int) -> Optional[PageSummary]:
+        """Stream a rendered introduction, stopping once max_chars of display text are extracted"""
+        session = await self.get_session()
+
+        params = {
+            'action': 'parse',
+            'format': 'json',
+            'formatversion': 2,  # "text" is a plain string and comes right after the title
+            'page': page_title,
+            'prop': 'text',
+            'section': 0  # Get the introduction section
+        }
+        params.update(PARSE_TRIM_PARAMS)
+
+        extractor = StreamingPageTextExtractor(max_chars)
+        utf8 = codecs.getincrementaldecoder('utf-8')()
+        received = 0
+        decode_seconds = 0.0
+
+        async def read() -> bool:
+            nonlocal received, decode_seconds
+            timeout = aiohttp.ClientTimeout(total=limit)
+            async with session.get(f"{self.base_url}/api.php", params=params, timeout=timeout) as response:
+                if response.status >= 500:
+                    response.raise_for_status()
+                if response.status != 200:
+                    return False
+                async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                    received += len(chunk)
+                    started = time.perf_counter()
+                    enough = extractor.feed_json(utf8.decode(chunk))
+                    decode_seconds += time.perf_counter() - started
+                    if enough:
+                        # Leaving the block drops the rest of the body unread
+                        break
+            return True
+
+        try:
+            async with lane_turn('network'):
+                limit, deadline_bound = request_limit(WIKI_REQUEST_TIMEOUT)
+                if not await self.breaker.call(read, deadline_bound):
+                    return None
+            self.record_payload('page_stream', received, decode_seconds)
+
+            if not extractor.in_text:
+                return None
+            return PageSummary(extractor.title or page_title, extractor.text())
+        except Exception as e:
+            print(f"Error streaming page content: {e}")
+            return None
+
+    async def get_page_sections(self, page_title: str) -> List[Dict[str, Any]]:
+        """Get the section list of a specific wiki page"""
+        return await self.cached(('sections', page_title), PAGE_CACHE_TTL, lambda: self._fetch_page_sections(page_title))
+
+    async def _fetch_page_sections(self, page_title: str) -> List[Dict[str, Any]]:
+        # Only ask for the table of contents, not the rendered page
+        params = {
+            'action': 'parse',
+            'format': 'json',
+            'page': page_title,
+            'prop': 'sections'
+        }
+
+        try:
+            data = await self.api_get(params, 'page_sections')
+            return trim_sections(data.get('parse', {}).get('sections', [])) if data else []
+        except Exception as e:
+            print(f"Error getting page sections: {e}")
+            return []
+
+    async def get_section_wikitext(self, page_title: str, section_index: str) -> Optional[Dict[str, Any]]:
+        """Get the raw wikitext of a single section of a wiki page"""
+        params = {
+            'action': 'parse',
+            'format': 'json',
+            'page': page_title,
+            'prop': 'wikitext|revid',
+            'section': section_index
+        }
+
+        try:
+            data = await self.api_get(params, 'section_wikitext')
+            if data and 'parse' in data:
+                return {
+                    'title': data['parse']['title'],
+                    'wikitext': data['parse']['wikitext']['*'],
+                    'revid': data['parse'].get('revid')
+                }
+            return None
+        except Exception as e:
+            print(f"Error getting section wikitext: {e}")
+            return None
+
+    async def get_drops_wikitext(self, page_title: str) -> Optional[Dict[str, Any]]:
+        """Get the raw wikitext of the drops section of a wiki page"""
+        sections = await self.get_page_sections(page_title)
+
+        for section in sections:
+            # Transcluded sections have indexes like "T-1" and can't be fetched directly
+            if not str(section.get('index', '')).isdigit():
+                continue
+            if DROPS_SECTION_PATTERN.search(clean_html(section.get('line', ''))):
+                return await self.get_section_wikitext(page_title, section['index'])
+
+        return None
+
+    async def get_category_members(self, category: str) -> List[str]:
+        """Get every main namespace page title in a wiki category"""
+        params = {
+            'action': 'query',
+            'format': 'json',
+            'list': 'categorymembers',
+            'cmtitle': category,
+            'cmnamespace': 0,  # Main namespace only
+            'cmprop': 'title',
+            'cmlimit': 'max'
+        }
+
+        titles = []
+        try:
+            while True:
+                data = await self.api_get(params, 'category_members')
+                if not data:
+                    break
+                titles.extend(member['title'] for member in data.get('query', {}).get('categorymembers', []))
+
+                # Follow the continuation token until the category is exhausted
+                if 'continue' not in data:
+                    break
+                params.update(data['continue'])
+        except Exception as e:
+            print(f"Error getting category members: {e}")
+        return titles
+
+    async def get_page_revisions(self, page_titles: List[str]) -> Dict[str, int]:
+        """Get the latest revision id of each page, 50 titles per request"""
+        revisions = {}
+        try:
+            for i in range(0, len(page_titles), 50):
+                params = {
+                    'action': 'query',
+                    'format': 'json',
+                    'prop': 'info',
+                    'titles': '|'.join(page_titles[i:i + 50])
+                }
+                data = await self.api_get(params, 'page_revisions')
+                for page in (data or {}).get('query', {}).get('pages', {}).values():
+                    if 'lastrevid' in page:
+                        revisions[page['title']] = page['lastrevid']
+        except Exception as e:
+            print(f"Error getting page revisions: {e}")
+        return revisions
+
+    async def iter_page_intros(self, batch_size: int = 20):
+        """Yield every main namespace article as (title, introduction) pairs, a batch at a time"""
+        params = {
+            'action': 'query',
+            'format': 'json',
+            'generator': 'allpages',
+            'gapnamespace': 0,
+            'gapfilterredir': 'nonredirects',
+            'gaplimit': batch_size,
+            'prop': 'extracts',
+            'exintro': 1,
+            'explaintext': 1,
+            'exlimit': batch_size  # TextExtracts serves at most 20 introductions per request
+        }
+
+        while True:
+            data = await self.api_get(params, 'page_intros')
+            if not data:
+                break
+            pages = data.get('query', {}).get('pages', {}).values()
+            # Extracts that didn't fit come back on the continuation of the same batch
+            yield [(page['title'], page['extract'].strip()) for page in pages if 'extract' in page]
+
+            if 'continue' not in data:
+                break
+            params.update(data['continue'])
+
+    async def get_changes_since(self, since: str) -> List[Dict[str, Any]]:
+        """Main namespace edits, new pages, moves and deletions since an ISO timestamp, oldest first
+
+        Stops early (returning what it has) if a request fails, so callers can
+        checkpoint the last change they saw and resume from there.
+        """
+        params = {
+            'action': 'query',
+            'format': 'json',
+            'list': 'recentchanges',
+            'rcnamespace': 0,
+            'rcdir': 'newer',
+            'rcstart': since,
+            'rctype': 'edit|new|log',
+            'rcprop': 'title|ids|timestamp|loginfo',
+            'rclimit': 'max'
+        }
+
+        changes = []
+        try:
+            while True:
+                data = await self.api_get(params, 'change_log')
+                if not data:
+                    break
+                for change in data.get('query', {}).get('recentchanges', []):
+                    # Of the log entries only moves and deletions (and undeletions) change pages
+                    if change['type'] != 'log' or change.get('logtype') in ('move', 'delete'):
+                        changes.append(change)
+
+                if 'continue' not in data:
+                    break
+                params.update(data['continue'])
+        except Exception as e:
+            print(f"Error getting recent changes: {e}")
+        return changes
+
+    async def get_page_wikitexts(self, page_titles: List[str]) -> Dict[str, Optional[Tuple[int, str, int, str, Optional[str], str]]]:
+        """Get the current page store row of each page, 50 titles per request
+
+        Rows are keyed by the wiki's (normalized) title, with None for pages that
+        no longer exist. Raises if a request fails, since a partial answer can't
+        be told apart from deletions.
+        """
+        pages = {}
+        for i in range(0, len(page_titles), 50):
+            params = {
+                'action': 'query',
+                'format': 'json',
+                'formatversion': 2,
+                'prop': 'revisions',
+                'rvprop': 'ids|timestamp|content',
+                'rvslots': 'main',
+                'titles': '|'.join(page_titles[i:i + 50])
+            }
+            data = await self.api_get(params, 'page_wikitext')
+            if not data or 'query' not in data:
+                raise RuntimeError("page text request failed")
+
+            for page in data['query'].get('pages', []):
+                if page.get('missing') or page.get('invalid') or not page.get('revisions'):
+                    pages[page['title']] = None
+                    continue
+                revision = page['revisions'][0]
+                wikitext = revision['slots']['main'].get('content', '')
+                redirect = REDIRECT_PATTERN.match(wikitext)
+                pages[page['title']] = (
+                    page['pageid'], page['title'], revision['revid'], revision['timestamp'],
+                    redirect.group(1).strip() if redirect else None, wikitext
+                )
+        return pages
+
     async def get_random_page(self) -> Optional[Dict[str, Any]]:
         """Get a random page from the OSRS Wiki"""
-        session = await self.get_session()
-        
         # Get random page
-        random_url = f"{self.base_url}/api.php"
         params = {
             'action': 'query',
             'format': 'json',
@@ -120,183 +1321,1403 @@ class OSRSWikiSearcher:
         }
         
         try:
-            async with session.get(random_url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    random_pages = data.get('query', {}).get('random', [])
-                    if random_pages:
-                        return random_pages[0]
-                return None
+            data = await self.api_get(params, 'random')
+            random_pages = (data or {}).get('query', {}).get('random', [])
+            if random_pages:
+                return random_pages[0]
+            return None
         except Exception as e:
             print(f"Error getting random page: {e}")
             return None
     
-    async def get_recent_changes(self, limit: int = 10) -> List[Dict[str, Any]]:
+    async def get_recent_changes(self, limit: int = 10) -> List[RecentChange]:
         """Get recent changes from the OSRS Wiki"""
-        session = await self.get_session()
-        
-        # Get recent changes
-        changes_url = f"{self.base_url}/api.php"
+        # Get recent changes; /recent only renders the title, editor and comment
         params = {
             'action': 'query',
             'format': 'json',
             'list': 'recentchanges',
             'rcnamespace': 0,  # Main namespace only
             'rclimit': limit,
-            'rcprop': 'title|timestamp|user|comment'
+            'rcprop': 'title|user|comment'
         }
         
         try:
-            async with session.get(changes_url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get('query', {}).get('recentchanges', [])
-                else:
-                    return []
+            data = await self.api_get(params, 'recent')
+            changes = data.get('query', {}).get('recentchanges', []) if data else []
+            # Hidden (revision deleted) editors and summaries come without the field
+            return [
+                RecentChange(change['title'], change.get('user', 'Unknown'), change.get('comment', 'No comment'))
+                for change in changes
+            ]
+        except Exception as e:
+            print(f"Error getting recent changes: {e}")
+            return []
+    
+    async def close(self):
+        """Close the session"""
+        for task in list(self.revalidating.values()):
+            task.cancel()
+        if self.session:
+            await self.session.close()
+
+class DropTableStore:
+    """Local SQLite store of parsed monster drop tables"""
+
+    def __init__(self, path: str = DROPS_DB_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA foreign_keys = ON;
+            CREATE TABLE IF NOT EXISTS monsters (
+                id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL UNIQUE COLLATE NOCASE,
+                revid INTEGER,
+                refreshed_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS drops (
+                monster_id INTEGER NOT NULL REFERENCES monsters(id) ON DELETE CASCADE,
+                position INTEGER NOT NULL,
+                item TEXT NOT NULL COLLATE NOCASE,
+                quantity TEXT NOT NULL,
+                rarity TEXT NOT NULL,
+                rate REAL,
+                category TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS drops_by_monster ON drops (monster_id, position);
+            CREATE INDEX IF NOT EXISTS drops_by_item ON drops (item);
+        """)
+
+    def get_drops(self, monster: str) -> Optional[Dict[str, Any]]:
+        """Get the stored drop table for a monster, or None if it isn't stored"""
+        monster_row = self.conn.execute(
+            "SELECT id, title, revid FROM monsters WHERE title = ?", (monster,)
+        ).fetchone()
+        if monster_row is None:
+            return None
+
+        rows = self.conn.execute(
+            "SELECT item, quantity, rarity, rate, category FROM drops "
+            "WHERE monster_id = ? ORDER BY position",
+            (monster_row['id'],)
+        ).fetchall()
+        return {
+            'title': monster_row['title'],
+            'revid': monster_row['revid'],
+            'records': [DropRow(*row) for row in rows]
+        }
+
+    def find_droppers(self, item: str, limit: int = 25) -> List[Tuple[str, DropRow]]:
+        """Find (monster, drop row) pairs for the monsters that drop an item, most likely drops first"""
+        query = (
+            "SELECT monsters.title, drops.item, drops.quantity, drops.rarity, drops.rate, drops.category "
+            "FROM drops JOIN monsters ON monsters.id = drops.monster_id "
+            "WHERE {} ORDER BY drops.rate IS NULL, drops.rate DESC, monsters.title LIMIT ?"
+        )
+        rows = self.conn.execute(query.format("drops.item = ?"), (item, limit)).fetchall()
+        if not rows:
+            # Fall back to the shortest item with that prefix ("dragon med" -> "Dragon med helm"),
+            # found with an index range scan, so every row is for the same item
+            match = self.conn.execute(
+                "SELECT item FROM drops WHERE item >= ? AND item < ? ORDER BY length(item), item LIMIT 1",
+                (item, item + '\U0010ffff')
+            ).fetchone()
+            if match is not None:
+                rows = self.conn.execute(query.format("drops.item = ?"), (match[0], limit)).fetchall()
+        return [(row[0], DropRow(*row[1:])) for row in rows]
+
+    def save_drops(self, monster: str, revid: Optional[int], records: List[DropRow]):
+        """Replace the stored drop table for a monster"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO monsters (title, revid, refreshed_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (title) DO UPDATE SET revid = excluded.revid, refreshed_at = excluded.refreshed_at",
+                (monster, revid, time.time())
+            )
+            monster_id = self.conn.execute(
+                "SELECT id FROM monsters WHERE title = ?", (monster,)
+            ).fetchone()['id']
+            self.conn.execute("DELETE FROM drops WHERE monster_id = ?", (monster_id,))
+            self.conn.executemany(
+                "INSERT INTO drops (monster_id, position, item, quantity, rarity, rate, category) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (monster_id, position, record.item, record.quantity,
+                     record.rarity, record.rate, record.category)
+                    for position, record in enumerate(records)
+                ]
+            )
+
+    def delete_drops(self, monsters: Iterable[str]):
+        """Forget the drop tables of deleted pages"""
+        with self.conn:
+            # Exact titles, so removing a case-variant redirect leaves the article's table alone
+            self.conn.executemany(
+                "DELETE FROM monsters WHERE title = ? COLLATE BINARY", [(monster,) for monster in monsters]
+            )
+
+    def get_revisions(self) -> Dict[str, Optional[int]]:
+        """Get the stored revision id of every monster"""
+        return {
+            row['title']: row['revid']
+            for row in self.conn.execute("SELECT title, revid FROM monsters")
+        }
+
+    def close(self):
+        """Close the database"""
+        self.conn.close()
+
+REDIRECT_PATTERN = re.compile(r'\s*#REDIRECT\s*\[\[([^\]|#]+)', re.IGNORECASE)
+
+def parse_wiki_timestamp(timestamp: str) -> float:
+    """Unix time of a MediaWiki timestamp such as 2024-01-31T12:00:00Z"""
+    return calendar.timegm(time.strptime(timestamp, '%Y-%m-%dT%H:%M:%SZ'))
+
+def xml_name(tag: str) -> str:
+    """Element name without its "{namespace}" prefix"""
+    return tag.rsplit('}', 1)[-1]
+
+def iter_dump_pages(path: str) -> Iterator[Tuple[int, str, int, str, Optional[str], str]]:
+    """Stream (page id, title, revid, timestamp, redirect target, wikitext) for every
+    main namespace page in a MediaWiki XML dump (.xml, .xml.bz2 or .xml.gz)
+
+    Each page is dropped from the tree once read, so memory stays flat however
+    big the dump is.
+    """
+    opener = bz2.open if path.endswith('.bz2') else gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as dump:
+        events = ElementTree.iterparse(dump, events=('start', 'end'))
+        _, root = next(events)
+        for event, element in events:
+            if event != 'end' or xml_name(element.tag) != 'page':
+                continue
+
+            fields = {xml_name(child.tag): child for child in element}
+            if fields['ns'].text == '0':
+                # History dumps list every revision; the last one is current
+                revision = [child for child in element if xml_name(child.tag) == 'revision'][-1]
+                revision_fields = {xml_name(child.tag): child for child in revision}
+                redirect = fields.get('redirect')
+                yield (
+                    int(fields['id'].text),
+                    fields['title'].text,
+                    int(revision_fields['id'].text),
+                    revision_fields['timestamp'].text,
+                    redirect.get('title') if redirect is not None else None,
+                    revision_fields['text'].text or ''
+                )
+            root.clear()
+
+class PageStore:
+    """Local SQLite copy of main namespace wiki pages and their current wikitext"""
+
+    def __init__(self, path: str = PAGE_STORE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        # Stores from before titles were case-sensitive may have lost articles to case-variant
+        # redirects ("Abyssal Whip" replacing "Abyssal whip"), so they can't be trusted
+        schema = self.conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'pages'").fetchone()
+        if schema and 'NOCASE' in schema[0]:
+            print(f"Discarding the page store in {path}, which was built with case-insensitive titles; ingest a dump again")
+            self.conn.executescript("DROP TABLE pages; DROP TABLE IF EXISTS meta;")
+        self.conn.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS pages (
+                page_id INTEGER PRIMARY KEY,
+                -- Titles differing only in case are different pages (often an article and a redirect)
+                title TEXT NOT NULL UNIQUE,
+                revid INTEGER NOT NULL,
+                timestamp TEXT NOT NULL,
+                redirect TEXT,
+                wikitext TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+
+    def save_pages(self, pages: List[Tuple[int, str, int, str, Optional[str], str]]):
+        """Insert or replace a batch of pages in one transaction"""
+        with self.conn:
+            # REPLACE also drops a row holding the title under an old page id (moved pages)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO pages (page_id, title, revid, timestamp, redirect, wikitext) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                pages
+            )
+
+    def delete_titles(self, titles: List[str]):
+        """Forget deleted pages"""
+        with self.conn:
+            self.conn.executemany("DELETE FROM pages WHERE title = ?", [(title,) for title in titles])
+
+    def iter_articles(self, titles: Optional[List[str]] = None) -> Iterator[Tuple[str, int, str]]:
+        """Yield (title, revid, wikitext) for every page (or just titles) that isn't a redirect"""
+        if titles is None:
+            yield from self.conn.execute("SELECT title, revid, wikitext FROM pages WHERE redirect IS NULL")
+            return
+        for i in range(0, len(titles), 500):
+            batch = titles[i:i + 500]
+            yield from self.conn.execute(
+                f"SELECT title, revid, wikitext FROM pages WHERE redirect IS NULL "
+                f"AND title IN ({', '.join('?' * len(batch))})",
+                batch
+            )
+
+    def get_wikitext(self, title: str) -> Optional[str]:
+        row = self.conn.execute("SELECT wikitext FROM pages WHERE title = ?", (title,)).fetchone()
+        return row[0] if row else None
+
+    def iter_revisions(self) -> Iterator[Tuple[str, int]]:
+        """Yield (title, revid) for every page that isn't a redirect, without loading wikitext"""
+        yield from self.conn.execute("SELECT title, revid FROM pages WHERE redirect IS NULL ORDER BY title")
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def clear(self):
+        """Forget every page and the sync checkpoint, before loading a new dump"""
+        with self.conn:
+            self.conn.execute("DELETE FROM pages")
+            self.conn.execute("DELETE FROM meta")
+
+    def current_at(self) -> Optional[float]:
+        """Unix time the stored pages are current to: the last sync, or the newest revision"""
+        timestamp = self.get_meta('sync_checkpoint') or self.latest_timestamp()
+        return parse_wiki_timestamp(timestamp) if timestamp else None
+
+    def latest_timestamp(self) -> Optional[str]:
+        """Timestamp of the newest stored revision"""
+        return self.conn.execute("SELECT MAX(timestamp) FROM pages").fetchone()[0]
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def close(self):
+        """Close the database"""
+        self.conn.close()
+
+class PageTextArchive:
+    """Read-only plain text of wiki pages in one memory-mapped file
+
+    Layout: a header, the page texts back to back (each zlib-compressed if
+    that helps), a fixed-width record per title id (offset, length, revid,
+    flags) and the newline separated titles in id order. Texts are read
+    straight from the OS page cache, so every bot process on the host shares
+    them. The file is replaced atomically on rebuild and readers reopen it
+    when they notice.
+    """
+
+    MAGIC = b'OSRSTXT1'
+    HEADER = struct.Struct('<8sIdQQ')  # magic, page count, built at, records offset, titles offset
+    RECORD = np.dtype([('offset', '<u8'), ('length', '<u4'), ('revid', '<u4'), ('flags', '<u4')])
+    COMPRESSED = 1
+
+    class Mapping:
+        """One opened archive file; refresh swaps in a whole new one, so readers never mix two files"""
+        __slots__ = ('file_id', 'data', 'records', 'titles', 'ids', 'built_at')
+
+        def __init__(self, file_id: Optional[Tuple[int, int]], data: Optional[mmap.mmap], records: np.ndarray,
+                     titles: List[str], built_at: float):
+            self.file_id = file_id
+            self.data = data
+            self.records = records
+            self.titles = titles
+            self.ids = {title: i for i, title in enumerate(titles)}
+            self.built_at = built_at
+
+        def text(self, title_id: int) -> str:
+            """The text of a page by title id"""
+            record = self.records[title_id]
+            start = int(record['offset'])
+            body = memoryview(self.data)[start:start + int(record['length'])]
+            if record['flags'] & PageTextArchive.COMPRESSED:
+                return zlib.decompress(body).decode('utf-8')
+            return str(body, 'utf-8')
+
+    def __init__(self, path: str = PAGE_TEXT_PATH, max_age: float = PAGE_TEXT_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.mapping = self.Mapping(None, None, np.zeros(0, dtype=self.RECORD), [], 0.0)
+        self.refresh()
+
+    def refresh(self):
+        """Map the archive again if it was rebuilt since it was opened"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if (stat.st_ino, stat.st_mtime_ns) == self.mapping.file_id:
+            return
+        try:
+            with open(self.path, 'rb') as archive_file:
+                data = mmap.mmap(archive_file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, count, built_at, records_at, titles_at = self.HEADER.unpack_from(data)
+            if magic != self.MAGIC:
+                raise ValueError("not a page text archive")
+            # A view of the mapped records, not a copy; the old mapping closes once unreferenced
+            records = np.frombuffer(data, dtype=self.RECORD, count=count, offset=records_at)
+            titles = data[titles_at:].decode('utf-8').split('\n') if count else []
+            # A single assignment, since pack_page_text refreshes from a worker thread
+            self.mapping = self.Mapping((stat.st_ino, stat.st_mtime_ns), data, records, titles, built_at)
+        except Exception as e:
+            print(f"Error opening page text archive: {e}")
+
+    def __len__(self) -> int:
+        return len(self.mapping.titles)
+
+    def get(self, title: str) -> Optional[PageSummary]:
+        """A page's text as a full text extract, or None if the archive lacks it or is stale"""
+        self.refresh()
+        mapping = self.mapping
+        title_id = mapping.ids.get(title)
+        if title_id is None or time.time() - mapping.built_at > self.max_age:
+            return None
+        return PageSummary(mapping.titles[title_id], mapping.text(title_id), int(mapping.records[title_id]['revid']))
+
+    def encoded(self, title: str, revid: int) -> Optional[Tuple[bytes, int]]:
+        """A page's stored bytes and flags if the archive has this revision, for reuse by a rebuild"""
+        mapping = self.mapping
+        title_id = mapping.ids.get(title)
+        if title_id is None or int(mapping.records[title_id]['revid']) != revid:
+            return None
+        record = mapping.records[title_id]
+        start = int(record['offset'])
+        return mapping.data[start:start + int(record['length'])], int(record['flags'])
+
+    @classmethod
+    def write(cls, path: str, pages: Iterable[Tuple[str, int, Callable[[], Tuple[bytes, int]]]],
+              built_at: Optional[float] = None) -> int:
+        """Write an archive from (title, revid, encode) triples and swap it in; returns the page count
+
+        Each writer gets its own temp file, so processes packing at the same
+        time never interleave writes; whichever finishes last wins.
+        """
+        titles = []
+        records = []
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(path)), prefix=f"{os.path.basename(path)}.", suffix='.tmp'
+        )
+        try:
+            with os.fdopen(fd, 'wb') as archive_file:
+                archive_file.write(b'\0' * cls.HEADER.size)
+                offset = cls.HEADER.size
+                for title, revid, encode in pages:
+                    body, flags = encode()
+                    archive_file.write(body)
+                    titles.append(title)
+                    records.append((offset, len(body), revid, flags))
+                    offset += len(body)
+
+                # Records start 8-byte aligned so readers can view them in place
+                padding = -offset % 8
+                archive_file.write(b'\0' * padding)
+                records_at = offset + padding
+                archive_file.write(np.array(records, dtype=cls.RECORD).tobytes())
+                titles_at = records_at + len(records) * cls.RECORD.itemsize
+                archive_file.write('\n'.join(titles).encode('utf-8'))
+
+                archive_file.seek(0)
+                archive_file.write(cls.HEADER.pack(cls.MAGIC, len(titles), built_at or time.time(), records_at, titles_at))
+            # mkstemp makes the file private; other bot users on the host read it too
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return len(titles)
+
+def encode_page_text(text: str) -> Tuple[bytes, int]:
+    """Page text as archive bytes and flags, compressed when large enough to benefit"""
+    body = text.encode('utf-8')
+    if PAGE_TEXT_COMPRESS and len(text) >= PAGE_TEXT_COMPRESS_MIN_CHARS:
+        compressed = zlib.compress(body, 6)
+        if len(compressed) < len(body):
+            return compressed, PageTextArchive.COMPRESSED
+    return body, 0
+
+# BM25 ranking, shared by the local search index and /ai context packing
+BM25_K1 = 1.5
+BM25_B = 0.75
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+STOP_WORDS = frozenset(
+    'a an and are as at be by for from how i in is it of on or that the to what when where which who why with'.split()
+)
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stop words, for ranking"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+def pack_strings(values: List[str]) -> np.ndarray:
+    """Store strings as one NUL separated UTF-8 byte array"""
+    return np.frombuffer('\0'.join(values).encode('utf-8'), dtype=np.uint8)
+
+def unpack_strings(packed: np.ndarray) -> List[str]:
+    return packed.tobytes().decode('utf-8').split('\0') if packed.size else []
+
+class SearchSegment:
+    """Immutable BM25 index over a batch of pages
+
+    Postings are packed into flat NumPy arrays: the documents of term i are
+    doc_ids[offsets[i]:offsets[i + 1]], with their term counts in freqs.
+    Title words count TITLE_WEIGHT times so title matches rank first.
+    """
+
+    TITLE_WEIGHT = 3
+    SNIPPET_CHARS = 200
+
+    def __init__(self, terms: List[str], offsets: np.ndarray, doc_ids: np.ndarray, freqs: np.ndarray,
+                 lengths: np.ndarray, titles: List[str], snippets: List[str], built_at: float):
+        self.terms = terms
+        self.term_ids = {term: i for i, term in enumerate(terms)}
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.freqs = freqs
+        self.lengths = lengths
+        self.titles = titles
+        self.snippets = snippets
+        self.built_at = built_at
+
+    @classmethod
+    def build(cls, pages: Iterable[Tuple[str, str]], built_at: Optional[float] = None) -> 'SearchSegment':
+        """Index (title, introduction text) pairs"""
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        titles, snippets, lengths = [], [], []
+        for doc_id, (title, text) in enumerate(pages):
+            tokens = tokenize(title) * cls.TITLE_WEIGHT + tokenize(text)
+            for term, count in Counter(tokens).items():
+                postings.setdefault(term, []).append((doc_id, count))
+            titles.append(title)
+            snippets.append(text[:cls.SNIPPET_CHARS])
+            lengths.append(len(tokens))
+
+        terms = sorted(postings)
+        sizes = np.array([len(postings[term]) for term in terms], dtype=np.int64)
+        pairs = np.array([pair for term in terms for pair in postings[term]], dtype=np.int64).reshape(-1, 2)
+        return cls(
+            terms,
+            np.concatenate(([0], np.cumsum(sizes))),
+            pairs[:, 0].astype(np.uint32),
+            np.minimum(pairs[:, 1], np.iinfo(np.uint16).max).astype(np.uint16),
+            np.array(lengths, dtype=np.float32),
+            titles, snippets,
+            time.time() if built_at is None else built_at
+        )
+
+    def postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(doc ids, term counts) of a term, or None when no page has it"""
+        i = self.term_ids.get(term)
+        if i is None:
+            return None
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.doc_ids[start:end], self.freqs[start:end]
+
+    def save(self, path: str):
+        np.savez(
+            path, offsets=self.offsets, doc_ids=self.doc_ids, freqs=self.freqs, lengths=self.lengths,
+            terms=pack_strings(self.terms), titles=pack_strings(self.titles),
+            snippets=pack_strings(self.snippets), built_at=np.array(self.built_at)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'SearchSegment':
+        with np.load(path) as data:
+            return cls(
+                unpack_strings(data['terms']), data['offsets'], data['doc_ids'], data['freqs'], data['lengths'],
+                unpack_strings(data['titles']), unpack_strings(data['snippets']), float(data['built_at'])
+            )
+
+class SearchIndex:
+    """Local full-text search over page titles and introductions, made of segments
+
+    Newer segments supersede older copies of the same page, and delta syncs
+    append small segments and remove deleted pages. search() only answers
+    when the best hits are younger than max_age (a sync vouches for every
+    segment), so the caller can fall back to the wiki API for misses and
+    stale data.
+    """
+
+    class State:
+        """The segments and their live masks; a rebuild swaps in a whole new one, so searches never mix two"""
+        __slots__ = ('segments', 'live', 'newest')
+
+        def __init__(self):
+            self.segments: List[SearchSegment] = []
+            # Per segment, which documents are still the newest copy of their page
+            self.live: List[np.ndarray] = []
+            # Where the newest copy of each page is, as (segment, document)
+            self.newest: Dict[str, Tuple[int, int]] = {}
+
+        def add_segment(self, segment: SearchSegment):
+            """Add a segment, superseding older copies of its pages"""
+            index = len(self.segments)
+            self.segments.append(segment)
+            self.live.append(np.ones(len(segment.titles), dtype=bool))
+            for doc, title in enumerate(segment.titles):
+                older = self.newest.get(title)
+                if older is not None:
+                    self.live[older[0]][older[1]] = False
+                self.newest[title] = (index, doc)
+
+        def apply_removals(self, removed: Dict[str, float], titles: Iterable[str]):
+            """Hide the titles whose newest copy was built before the page was removed"""
+            for title in titles:
+                location = self.newest.get(title)
+                if location is not None and removed[title] >= self.segments[location[0]].built_at:
+                    self.live[location[0]][location[1]] = False
+
+    def __init__(self, path: str = SEARCH_INDEX_PATH, max_age: float = SEARCH_INDEX_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.state = self.State()
+        # When a sync last brought every segment up to date, and pages deleted since they were built
+        self.current_at = 0.0
+        self.removed: Dict[str, float] = {}
+        self.load()
+
+    def load(self):
+        """Load the saved segments, oldest first (a missing index is just empty)"""
+        if not os.path.isdir(self.path):
+            return
+        state_path = os.path.join(self.path, 'state.json')
+        if os.path.exists(state_path):
+            with open(state_path) as state_file:
+                saved = json.load(state_file)
+            self.current_at = saved['current_at']
+            self.removed = saved['removed']
+        state = self.State()
+        for name in sorted(os.listdir(self.path)):
+            if name.endswith('.npz'):
+                try:
+                    state.add_segment(SearchSegment.load(os.path.join(self.path, name)))
+                except Exception as e:
+                    print(f"Error loading search index segment {name}: {e}")
+        state.apply_removals(self.removed, self.removed)
+        self.state = state
+        if state.segments:
+            print(f"Loaded search index: {self.document_count()} page(s) in {len(state.segments)} segment(s)")
+
+    def save(self):
+        """Write every segment, replacing what was saved before"""
+        os.makedirs(self.path, exist_ok=True)
+        for name in os.listdir(self.path):
+            if name.endswith('.npz'):
+                os.remove(os.path.join(self.path, name))
+        for i, segment in enumerate(self.state.segments):
+            segment.save(os.path.join(self.path, f"segment-{i:04d}.npz"))
+        self.save_state()
+
+    def save_state(self):
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, 'state.json'), 'w') as state_file:
+            json.dump({'current_at': self.current_at, 'removed': self.removed}, state_file)
+
+    def replace(self, segment: SearchSegment):
+        """Swap in a freshly built index and save it
+
+        Safe to call from a worker thread: the new state is built aside and
+        swapped in with one assignment while searches carry on.
+        """
+        state = self.State()
+        state.add_segment(segment)
+        self.state = state
+        self.current_at = segment.built_at
+        self.removed = {}
+        self.save()
+
+    def append(self, segment: SearchSegment):
+        """Add a delta segment and save just that segment"""
+        self.state.add_segment(segment)
+        os.makedirs(self.path, exist_ok=True)
+        segment.save(os.path.join(self.path, f"segment-{len(self.state.segments) - 1:04d}.npz"))
+
+    def remove(self, titles: Iterable[str]):
+        """Hide deleted pages from every segment built before now"""
+        titles = list(titles)
+        removed_at = time.time()
+        for title in titles:
+            self.removed[title] = removed_at
+        self.state.apply_removals(self.removed, titles)
+        self.save_state()
+
+    def mark_current(self, current_at: float):
+        """Record that a sync has brought every segment up to date"""
+        self.current_at = current_at
+        self.save_state()
+
+    def segment_count(self) -> int:
+        return len(self.state.segments)
+
+    def document_count(self) -> int:
+        return int(sum(live.sum() for live in self.state.live))
+
+    def search(self, query: str, limit: int) -> Optional[List[SearchHit]]:
+        """Best pages for query as search hits, or None when the API should answer instead"""
+        terms = set(tokenize(query))
+        # One snapshot for the whole search, since a rebuild may swap the state from another thread
+        state = self.state
+        segments, lives = state.segments, state.live
+        if not terms or not segments:
+            return None
+
+        # Collection statistics across segments, so scores are comparable between them
+        total_docs = sum(len(segment.titles) for segment in segments)
+        average_length = sum(float(segment.lengths.sum()) for segment in segments) / max(total_docs, 1)
+        term_postings = {term: [segment.postings(term) for segment in segments] for term in terms}
+
+        candidates = []
+        for i, (segment, live) in enumerate(zip(segments, lives)):
+            if not segment.titles:
+                continue
+            scores = np.zeros(len(segment.titles), dtype=np.float32)
+            norms = BM25_K1 * (1 - BM25_B + BM25_B * segment.lengths / average_length)
+            for term, postings in term_postings.items():
+                if postings[i] is None:
+                    continue
+                df = sum(len(posting[0]) for posting in postings if posting is not None)
+                idf = np.log1p((total_docs - df + 0.5) / (df + 0.5))
+                doc_ids, freqs = postings[i]
+                tf = freqs.astype(np.float32)
+                scores[doc_ids] += idf * tf * (BM25_K1 + 1) / (tf + norms[doc_ids])
+            scores[~live] = 0
+            top = np.argpartition(-scores, min(limit, len(scores) - 1))[:limit]
+            candidates.extend((float(scores[doc]), i, int(doc)) for doc in top if scores[doc] > 0)
+
+        if not candidates:
+            return None
+        candidates.sort(reverse=True)
+        best = candidates[:limit]
+        if any(time.time() - max(segments[i].built_at, self.current_at) > self.max_age for _, i, _ in best):
+            return None
+        return [
+            SearchHit(segments[i].titles[doc], segments[i].snippets[doc])
+            for _, i, doc in best
+        ]
+
+class GEPriceIndex:
+    """In-memory snapshot of Grand Exchange prices from the wiki's bulk price API"""
+
+    def __init__(self, base_url: str = OSRS_PRICES_API_URL,
+                 decoder: Optional[Callable[[bytes], Any]] = None):
+        self.base_url = base_url
+        self.session = None
+        self.decoder = decoder or default_json_decoder()
+        self.updated_at = None
+        self.mapping_updated_at = None
+        # The download in progress, shared by the refresh loop and a /price waiting on the first snapshot
+        self.refreshing: Optional[asyncio.Task] = None
+
+        # Item tables indexed directly by item id; 0 means "no data"
+        self.names: List[Optional[str]] = []
+        self.name_to_id: Dict[str, int] = {}
+        self.members = np.zeros(0, dtype=bool)
+        self.buy_limit = np.zeros(0, dtype=np.int64)
+        self.store_value = np.zeros(0, dtype=np.int64)
+        self.high_alch = np.zeros(0, dtype=np.int64)
+        self.high = np.zeros(0, dtype=np.int64)
+        self.high_time = np.zeros(0, dtype=np.int64)
+        self.low = np.zeros(0, dtype=np.int64)
+        self.low_time = np.zeros(0, dtype=np.int64)
+
+    async def get_session(self):
+        if self.session is None:
+            # The price API asks for a descriptive User-Agent
+            self.session = aiohttp.ClientSession(headers={'User-Agent': PRICES_USER_AGENT})
+        return self.session
+
+    async def fetch(self, endpoint: str) -> Optional[Any]:
+        """Fetch one bulk endpoint of the price API"""
+        session = await self.get_session()
+
+        try:
+            async with session.get(f"{self.base_url}/{endpoint}") as response:
+                if response.status == 200:
+                    # The mapping is over a megabyte, so decode the raw bytes with the fast decoder
+                    return self.decoder(await response.read())
+                return None
+        except Exception as e:
+            print(f"Error fetching prices from {endpoint}: {e}")
+            return None
+
+    async def refresh(self) -> bool:
+        """Refresh the latest prices, and the item mapping when it is missing or old
+
+        Callers arriving while a refresh is running wait for that one
+        instead of downloading the snapshot again.
+        """
+        if self.refreshing is None:
+            self.refreshing = asyncio.create_task(self._refresh())
+            self.refreshing.add_done_callback(self._refresh_done)
+        # A cancelled command mustn't cancel the download the other callers are waiting on
+        return await asyncio.shield(self.refreshing)
+
+    def _refresh_done(self, task: asyncio.Task):
+        self.refreshing = None
+
+    async def _refresh(self) -> bool:
+        mapping_age = time.time() - (self.mapping_updated_at or 0)
+        if not self.names or mapping_age > PRICES_MAPPING_REFRESH_INTERVAL:
+            mapping = await self.fetch('mapping')
+            if mapping:
+                self.load_mapping(mapping)
+
+        latest = await self.fetch('latest')
+        if not latest or not self.names:
+            return False
+
+        self.load_latest(latest.get('data', {}))
+        return True
+
+    def load_mapping(self, mapping: List[Dict[str, Any]]):
+        """Build the id-indexed item tables from the /mapping endpoint"""
+        size = max(item['id'] for item in mapping) + 1
+        ids = np.array([item['id'] for item in mapping], dtype=np.int64)
+
+        names: List[Optional[str]] = [None] * size
+        for item in mapping:
+            names[item['id']] = item['name']
+
+        members = np.zeros(size, dtype=bool)
+        members[ids] = [bool(item.get('members')) for item in mapping]
+        buy_limit = np.zeros(size, dtype=np.int64)
+        buy_limit[ids] = [item.get('limit') or 0 for item in mapping]
+        store_value = np.zeros(size, dtype=np.int64)
+        store_value[ids] = [item.get('value') or 0 for item in mapping]
+        high_alch = np.zeros(size, dtype=np.int64)
+        high_alch[ids] = [item.get('highalch') or 0 for item in mapping]
+
+        # Swap everything in at once so lookups never see a half-built table
+        self.names = names
+        self.name_to_id = {item['name'].lower(): item['id'] for item in mapping}
+        self.members, self.buy_limit, self.store_value, self.high_alch = members, buy_limit, store_value, high_alch
+        self.high = np.zeros(size, dtype=np.int64)
+        self.high_time = np.zeros(size, dtype=np.int64)
+        self.low = np.zeros(size, dtype=np.int64)
+        self.low_time = np.zeros(size, dtype=np.int64)
+        self.mapping_updated_at = time.time()
+
+    def load_latest(self, latest: Dict[str, Dict[str, Any]]):
+        """Fill the price tables from the /latest endpoint"""
+        size = len(self.names)
+        rows = [(int(item_id), price) for item_id, price in latest.items() if int(item_id) < size]
+        ids = np.array([item_id for item_id, _ in rows], dtype=np.int64)
+
+        tables = {}
+        for key in ('high', 'highTime', 'low', 'lowTime'):
+            table = np.zeros(size, dtype=np.int64)
+            table[ids] = [price.get(key) or 0 for _, price in rows]
+            tables[key] = table
+
+        self.high, self.high_time = tables['high'], tables['highTime']
+        self.low, self.low_time = tables['low'], tables['lowTime']
+        self.updated_at = time.time()
+
+    def lookup_id(self, name: str) -> Optional[int]:
+        """Resolve an item name to its id: exact, then prefix, then substring match"""
+        name = name.strip().lower()
+        if name in self.name_to_id:
+            return self.name_to_id[name]
+
+        prefix_matches = [item for item in self.name_to_id if item.startswith(name)]
+        matches = prefix_matches or [item for item in self.name_to_id if name in item]
+        if matches:
+            # The shortest match is usually the base item ("dragon dagger" over "dragon dagger(p++)")
+            return self.name_to_id[min(matches, key=len)]
+        return None
+
+    def get_price(self, item_id: int) -> Dict[str, Any]:
+        """Get everything known about an item id"""
+        return {
+            'id': item_id,
+            'name': self.names[item_id],
+            'members': bool(self.members[item_id]),
+            'limit': int(self.buy_limit[item_id]),
+            'value': int(self.store_value[item_id]),
+            'highalch': int(self.high_alch[item_id]),
+            'high': int(self.high[item_id]) or None,
+            'high_time': int(self.high_time[item_id]) or None,
+            'low': int(self.low[item_id]) or None,
+            'low_time': int(self.low_time[item_id]) or None
+        }
+
+    def values_for(self, names: List[str]) -> np.ndarray:
+        """GP value of one of each named item, 0 where unknown"""
+        ids = np.array([self.name_to_id.get(name.lower(), -1) for name in names], dtype=np.int64)
+        known = ids >= 0
+        values = np.zeros(len(names), dtype=np.float64)
+        if not known.any():
+            return values
+
+        known_ids = ids[known]
+        high = self.high[known_ids].astype(np.float64)
+        low = self.low[known_ids].astype(np.float64)
+        # Mid price when both sides traded, otherwise whichever side did, otherwise the store value (coins)
+        mid = np.where((high > 0) & (low > 0), (high + low) / 2, np.maximum(high, low))
+        values[known] = np.where(mid > 0, mid, self.store_value[known_ids])
+        return values
+
+    async def close(self):
+        """Close the session"""
+        if self.session:
+            await self.session.close()
+
+# Initialize the local search index (empty until one has been built)
+search_index = SearchIndex()
+
+# Initialize the shared page text archive (empty until the page store has been packed)
+page_texts = PageTextArchive()
+
+# Initialize wiki searcher
+wiki_searcher = OSRSWikiSearcher(index=search_index, texts=page_texts)
+
+# Initialize the rendered embed cache
+embed_cache = EmbedCache()
+
+# /ai answers from the wiki text alone while OpenAI keeps failing
+openai_breaker = CircuitBreaker('OpenAI')
+
+# One fair queue per priority lane, so a saturated lane never holds up the others
+LANES = {name: FairScheduler(weights=SCHEDULER_GUILD_WEIGHTS, **settings) for name, settings in LANE_SETTINGS.items()}
+
+# Initialize the local drop table store
+drop_store = DropTableStore()
+
+# Initialize the local page store (empty until a dump has been ingested)
+page_store = PageStore()
+
+async def load_drop_table(target: str) -> Tuple[Optional[str], List[DropRow]]:
+    """Get (page title, drop records) for a target, preferring the local drop store"""
+    # Answer straight from the local drop store when the monster is already indexed
+    stored = drop_store.get_drops(target)
+    if stored and stored['records']:
+        return stored['title'], stored['records']
+
+    results = await wiki_searcher.search_wiki(target, profile='lookup')
+    if not results:
+        return None, []
+
+    # Get the first (most relevant) result
+    page_title = results[0].title
+    stored = drop_store.get_drops(page_title)
+    if stored and stored['records']:
+        return stored['title'], stored['records']
+
+    # Parse the drop table templates straight from the drops section wikitext
+    drops_page = await wiki_searcher.get_drops_wikitext(page_title)
+    records = parse_drops_wikitext(drops_page['wikitext']) if drops_page else []
+    if records:
+        drop_store.save_drops(drops_page['title'], drops_page['revid'], records)
+    return page_title, records
+
+# Initialize the Grand Exchange price snapshot
+price_index = GEPriceIndex()
+
+async def price_refresh_loop():
+    """Keep the Grand Exchange price snapshot fresh"""
+    while True:
+        try:
+            await price_index.refresh()
+        except Exception as e:
+            print(f"Error refreshing prices: {e}")
+        await asyncio.sleep(PRICES_REFRESH_INTERVAL)
+
+async def refresh_drop_store():
+    """Re-parse the drop tables of monsters whose wiki page changed since the last pass"""
+    monsters = await wiki_searcher.get_category_members(DROPS_MONSTER_CATEGORY)
+    if not monsters:
+        return
+
+    latest = await wiki_searcher.get_page_revisions(monsters)
+    stored = drop_store.get_revisions()
+    changed = [title for title, revid in latest.items() if stored.get(title) != revid]
+
+    refreshed = 0
+    for title in changed:
+        drops_page = await wiki_searcher.get_drops_wikitext(title)
+        records = parse_drops_wikitext(drops_page['wikitext']) if drops_page else []
+        # Record the revision even without drops so unchanged pages are skipped next pass
+        drop_store.save_drops(title, latest[title], records)
+        refreshed += 1
+
+        # Be gentle with the wiki between page fetches
+        await asyncio.sleep(DROPS_REFRESH_DELAY)
+
+    print(f"Drop store refreshed {refreshed} of {len(latest)} monster page(s)")
+
+async def drop_store_refresh_loop():
+    """Keep the drop table store in sync with the wiki"""
+    while True:
+        try:
+            await refresh_drop_store()
         except Exception as e:
-            print(f"Error getting recent changes: {e}")
-            return []
-    
-    async def close(self):
-        """Close the session"""
-        if self.session:
-            await self.session.close()
+            print(f"Error refreshing drop store: {e}")
+        await asyncio.sleep(DROPS_REFRESH_INTERVAL)
 
-# Initialize wiki searcher
-wiki_searcher = OSRSWikiSearcher()
+async def build_search_index():
+    """Index every article's title and introduction from the API, replacing the saved index"""
+    pages = []
+    started = time.monotonic()
+    try:
+        async for batch in wiki_searcher.iter_page_intros():
+            pages.extend(batch)
+            if len(pages) // 1000 != (len(pages) - len(batch)) // 1000:
+                print(f"Fetched {len(pages)} page(s)...")
+    finally:
+        await wiki_searcher.close()
+
+    search_index.replace(SearchSegment.build(pages))
+    print(f"Indexed {len(pages)} page(s) in {time.monotonic() - started:.0f}s into {SEARCH_INDEX_PATH}")
+
+def index_pages(titles: Optional[List[str]] = None, removed: Iterable[str] = (),
+                built_at: Optional[float] = None):
+    """Rebuild the search index from the page store, or with titles, add just those pages
+    as a delta segment and hide the removed ones. built_at is when the pages were current"""
+    segment = SearchSegment.build(
+        ((title, wikitext_intro(wikitext)) for title, _, wikitext in page_store.iter_articles(titles)),
+        built_at=built_at,
+    )
+    if titles is None:
+        search_index.replace(segment)
+        return
+    search_index.remove(removed)
+    if segment.titles:
+        search_index.append(segment)
+
+def extract_drop_tables(titles: Optional[List[str]] = None, removed: Iterable[str] = ()) -> int:
+    """Re-parse drop tables from the page store (all pages, or just titles); returns how many were saved"""
+    monsters = 0
+    for title, revid, wikitext in page_store.iter_articles(titles):
+        section = drops_section_wikitext(wikitext)
+        records = parse_drops_wikitext(section) if section else []
+        if records:
+            drop_store.save_drops(title, revid, records)
+            monsters += 1
+        elif titles is not None:
+            # The drop table was edited away
+            drop_store.delete_drops([title])
+    drop_store.delete_drops(removed)
+    return monsters
+
+def pack_page_text(built_at: Optional[float] = None) -> int:
+    """Rewrite the page text archive from the page store; returns how many pages it holds
+
+    Pages whose revision is unchanged keep their stored bytes, so after a
+    delta sync only the edited pages are converted and compressed again.
+    The file is still written out in full, which is why syncs repack at
+    most every PAGE_TEXT_PACK_INTERVAL seconds.
+    """
+    def encoder(title: str, revid: int) -> Callable[[], Tuple[bytes, int]]:
+        def encode():
+            return page_texts.encoded(title, revid) or encode_page_text(
+                wikitext_plaintext(page_store.get_wikitext(title) or '')
+            )
+        return encode
+
+    count = PageTextArchive.write(
+        PAGE_TEXT_PATH, ((title, revid, encoder(title, revid)) for title, revid in page_store.iter_revisions()),
+        built_at=built_at,
+    )
+    page_texts.refresh()
+    return count
+
+def page_text_age() -> float:
+    """Seconds since the page text archive was last written, by this or any other bot process"""
+    try:
+        return time.time() - os.path.getmtime(PAGE_TEXT_PATH)
+    except OSError:
+        return float('inf')
+
+def index_page_store():
+    """Rebuild the local search index, drop tables and page text archive from the page store"""
+    started = time.monotonic()
+    # Stamped with the data's age rather than the build's, so a months-old dump reads as stale
+    built_at = page_store.current_at()
+    index_pages(built_at=built_at)
+    monsters = extract_drop_tables()
+    pack_page_text(built_at)
+    print(f"Indexed {search_index.document_count()} page(s) and {monsters} drop table(s) "
+          f"in {time.monotonic() - started:.0f}s")
+
+def ingest_dump(path: str):
+    """Load a MediaWiki XML dump into the page store, then rebuild what is derived from it"""
+    started = time.monotonic()
+    # The dump replaces the store outright, so pages it no longer has don't linger
+    page_store.clear()
+    ingested = 0
+    batch = []
+    for page in iter_dump_pages(path):
+        batch.append(page)
+        if len(batch) == DUMP_BATCH_SIZE:
+            page_store.save_pages(batch)
+            ingested += len(batch)
+            batch = []
+            if ingested % DUMP_REPORT_EVERY == 0:
+                print(f"Ingested {ingested} page(s) ({ingested / (time.monotonic() - started):.0f} pages/s)")
+    if batch:
+        page_store.save_pages(batch)
+        ingested += len(batch)
+
+    elapsed = time.monotonic() - started
+    print(f"Ingested {ingested} page(s) in {elapsed:.0f}s ({ingested / max(elapsed, 1e-9):.0f} pages/s) into {PAGE_STORE_PATH}")
+    # Delta syncs pick up from the newest revision in the dump
+    latest = page_store.latest_timestamp()
+    if latest:
+        page_store.set_meta('sync_checkpoint', latest)
+        page_store.set_meta('sync_rcid', '0')
+    index_page_store()
+
+async def sync_page_store() -> int:
+    """Apply the wiki's changes since the last checkpoint to the page store, search index
+    and drop tables; returns how many pages were refetched"""
+    since = page_store.get_meta('sync_checkpoint')
+    if since is None:
+        print("Page store has no sync checkpoint; ingest a dump first")
+        return 0
+    if time.time() - parse_wiki_timestamp(since) > RECENT_CHANGES_MAX_AGE:
+        print(f"Page store checkpoint {since} is older than the wiki's recent changes; ingest a fresh dump")
+        return 0
+
+    # rcstart is inclusive, so skip the changes the last pass already applied
+    last_change = int(page_store.get_meta('sync_rcid') or 0)
+    changes = [
+        change for change in await wiki_searcher.get_changes_since(since)
+        if change['rcid'] > last_change
+    ]
+    if not changes:
+        return 0
+
+    # Edits and new pages touch their title; moves touch both titles. Deletions are
+    # refetched too, since the page may have been restored since
+    titles = set()
+    for change in changes:
+        titles.add(change['title'])
+        params = change.get('logparams') or {}
+        if change.get('logtype') == 'move' and params.get('target_ns') == 0:
+            titles.add(params['target_title'])
+
+    pages = await wiki_searcher.get_page_wikitexts(sorted(titles))
+    present = [page for page in pages.values() if page]
+    # Missing pages are gone; pages that became redirects (moved away) leave the index
+    removed = [title for title, page in pages.items() if page is None or page[4] is not None]
+    articles = [page[1] for page in present if page[4] is None]
+
+    checkpoint = changes[-1]['timestamp']
+    current_at = parse_wiki_timestamp(checkpoint)
+    page_store.save_pages(present)
+    page_store.delete_titles([title for title, page in pages.items() if page is None])
+    if search_index.segment_count() >= SEARCH_INDEX_MAX_SEGMENTS:
+        # Merge the delta segments; the build is slow, so keep it off the event loop
+        await asyncio.to_thread(index_pages, built_at=current_at)
+    else:
+        index_pages(articles, removed)
+    extract_drop_tables(articles, removed)
+    if page_text_age() >= PAGE_TEXT_PACK_INTERVAL:
+        await asyncio.to_thread(pack_page_text, current_at)
+
+    page_store.set_meta('sync_checkpoint', checkpoint)
+    page_store.set_meta('sync_rcid', str(max(change['rcid'] for change in changes)))
+    search_index.mark_current(current_at)
+    print(f"Synced {len(pages)} changed page(s) up to {checkpoint}")
+    return len(pages)
+
+async def page_sync_loop():
+    """Keep the page store within minutes of the live wiki"""
+    while True:
+        try:
+            await sync_page_store()
+        except Exception as e:
+            print(f"Error syncing page store: {e}")
+        await asyncio.sleep(PAGE_SYNC_INTERVAL)
+
+async def run_page_sync():
+    """One sync pass from the command line"""
+    try:
+        await sync_page_store()
+    finally:
+        await wiki_searcher.close()
+
+# Background tasks started once, even if on_ready fires again after a reconnect
+background_tasks = []
 
 @bot.event
 async def on_ready():
     print(f'{bot.user} has connected to Discord!')
+    if not background_tasks:
+        background_tasks.append(asyncio.create_task(price_refresh_loop()))
+        if DROPS_REFRESH_INTERVAL > 0:
+            background_tasks.append(asyncio.create_task(drop_store_refresh_loop()))
+        if PAGE_SYNC_INTERVAL > 0 and page_store.get_meta('sync_checkpoint'):
+            background_tasks.append(asyncio.create_task(page_sync_loop()))
     try:
         synced = await bot.tree.sync()
         print(f"Synced {len(synced)} command(s)")
     except Exception as e:
         print(f"Failed to sync commands: {e}")
 
-@bot.tree.command(name="search", description="Search the Old School RuneScape Wiki")
-async def search_wiki(interaction: discord.Interaction, query: str):
-    """Search the OSRS Wiki for information"""
-    await interaction.response.defer()
-    
+async def respond_with_embed(interaction: discord.Interaction, command: str,
+                             build: Awaitable[Union[discord.Embed, Tuple[discord.Embed, Optional[discord.ui.View]]]],
+                             error_message: str):
+    """Reply in one round trip when the embed is ready within the budget, otherwise defer first
+
+    Builders of interactive replies return (embed, view) instead of just the embed.
+    """
+    # Set before the build task starts so it inherits the command's deadline
+    start_deadline(interaction, command)
+    task = asyncio.ensure_future(build)
+    done, _ = await asyncio.wait({task}, timeout=FAST_REPLY_BUDGET)
+
+    # Cache misses still have to acknowledge the interaction before Discord's 3 second limit
+    if not done:
+        await interaction.response.defer()
+
+    view = None
     try:
-        # Search for results
-        results = await wiki_searcher.search_wiki(query)
-        
-        if not results:
-            embed = discord.Embed(
-                title="❌ No Results Found",
-                description=f"No results found for '{query}' on the OSRS Wiki.",
-                color=discord.Color.red()
-            )
-            await interaction.followup.send(embed=embed)
-            return
-        
-        # Create embed with search results
-        embed = discord.Embed(
-            title=f"🔍 Search Results for '{query}'",
-            description=f"Found {len(results)} result(s) on the OSRS Wiki:",
-            color=discord.Color.blue(),
-            url=f"{OSRS_WIKI_BASE_URL}/Special:Search?search={urllib.parse.quote(query)}"
-        )
-        
-        for i, result in enumerate(results[:3], 1):  # Show top 3 results
-            title = result['title']
-            snippet = result['snippet']
-            
-            # Clean up snippet
-            snippet = clean_html(snippet)
-            
-            # Create page URL
-            page_url = f"{OSRS_WIKI_BASE_URL}/{title.replace(' ', '_')}"
-            
-            embed.add_field(
-                name=f"{i}. {title}",
-                value=f"{snippet[:200]}...\n[Read More]({page_url})",
-                inline=False
-            )
-        
-        embed.set_footer(text="Click on the links to read more on the OSRS Wiki")
-        await interaction.followup.send(embed=embed)
-        
+        embed = await task
+        if isinstance(embed, tuple):
+            embed, view = embed
     except Exception as e:
-        error_embed = discord.Embed(
+        embed = discord.Embed(
             title="❌ Error",
-            description=f"An error occurred while searching: {str(e)}",
+            description=f"{error_message}: {str(e)}",
             color=discord.Color.red()
         )
-        await interaction.followup.send(embed=error_embed)
 
-@bot.tree.command(name="info", description="Get detailed information about a specific OSRS topic")
-async def get_info(interaction: discord.Interaction, topic: str):
-    """Get detailed information about a specific OSRS topic"""
-    await interaction.response.defer()
+    # discord.py wants the view left out rather than None
+    extra = {'view': view} if view else {}
+    if interaction.response.is_done():
+        await interaction.followup.send(embed=embed, **extra)
+    else:
+        await interaction.response.send_message(embed=embed, **extra)
+
+def wiki_unavailable() -> bool:
+    """Whether an empty answer may mean we gave up on the wiki rather than that nothing matched"""
+    return deadline_expired() or wiki_searcher.breaker.is_open()
+
+def build_timeout_embed(query: str) -> discord.Embed:
+    """Say the wiki was too slow or down rather than claiming nothing matched"""
+    return discord.Embed(
+        title="⏱️ Wiki Unavailable",
+        description=f"The OSRS Wiki is slow or unavailable right now, so '{query}' couldn't be looked up. Please try again in a moment.",
+        color=discord.Color.orange()
+    )
+
+def build_partial_embed(page_title: str, missing: str) -> discord.Embed:
+    """Point at the page we found when the command ran out of time before loading it"""
+    return discord.Embed(
+        title=f"⏱️ {page_title}",
+        description=f"{missing} couldn't be loaded in time, but this is the best match on the OSRS Wiki.",
+        color=discord.Color.orange(),
+        url=f"{OSRS_WIKI_BASE_URL}/{page_title.replace(' ', '_')}"
+    )
+
+async def build_search_page(query: str, page: int = 0) -> Tuple[discord.Embed, bool]:
+    """Build one page of /search results and whether another page follows, reusing cached renders"""
+    # Each page asks for one result more than it shows, to know whether a next page exists
+    results = await wiki_searcher.search_wiki(query, offset=page * SEARCH_PAGE_SIZE)
+    has_next = len(results) > SEARCH_PAGE_SIZE
+
+    cache_key = f"{canonical_input(query)}|{page}"
+    cached = embed_cache.get('search', cache_key)
+    if cached:
+        return cached, has_next
     
-    try:
-        # First search for the topic
-        results = await wiki_searcher.search_wiki(topic)
-        
-        if not results:
-            embed = discord.Embed(
-                title="❌ Topic Not Found",
-                description=f"Could not find information about '{topic}' on the OSRS Wiki.",
-                color=discord.Color.red()
-            )
-            await interaction.followup.send(embed=embed)
-            return
-        
-        # Get the first (most relevant) result
-        best_match = results[0]
-        page_title = best_match['title']
-        
-        # Get detailed content
-        content = await wiki_searcher.get_page_content(page_title)
-        
-        if not content:
-            embed = discord.Embed(
-                title="❌ Content Error",
-                description=f"Could not retrieve content for '{page_title}'.",
-                color=discord.Color.red()
-            )
-            await interaction.followup.send(embed=embed)
-            return
+    if not results:
+        if wiki_unavailable():
+            return build_timeout_embed(query), False
+        return discord.Embed(
+            title="❌ No Results Found",
+            description=f"No {'more ' if page else ''}results found for '{query}' on the OSRS Wiki.",
+            color=discord.Color.red()
+        ), False
+    
+    # Create embed with search results
+    first = page * SEARCH_PAGE_SIZE + 1
+    shown = results[:SEARCH_PAGE_SIZE]
+    embed = discord.Embed(
+        title=f"🔍 Search Results for '{query}'",
+        description=f"Results {first}–{first + len(shown) - 1} on the OSRS Wiki:",
+        color=discord.Color.blue(),
+        url=f"{OSRS_WIKI_BASE_URL}/Special:Search?search={urllib.parse.quote(query)}"
+    )
+    
+    for i, result in enumerate(shown, first):
+        title = result.title
+        snippet = result.snippet
         
-        # Extract and clean content
-        text = clean_html(content['content'])
+        # Clean up snippet
+        snippet = clean_html(snippet)
         
-        # Limit text length
-        if len(text) > 1500:
-            text = text[:1500] + "..."
+        # Create page URL
+        page_url = f"{OSRS_WIKI_BASE_URL}/{title.replace(' ', '_')}"
         
-        # Create embed
-        embed = discord.Embed(
-            title=f"📖 {page_title}",
-            description=text,
-            color=discord.Color.green(),
-            url=f"{OSRS_WIKI_BASE_URL}/{page_title.replace(' ', '_')}"
+        embed.add_field(
+            name=f"{i}. {title}",
+            value=f"{snippet[:200]}...\n[Read More]({page_url})",
+            inline=False
         )
-        
-        # Add sections if available
-        if content.get('sections'):
-            sections_text = "**Available Sections:**\n"
-            for section in content['sections'][:5]:  # Show first 5 sections
-                sections_text += f"• {section['line']}\n"
-            embed.add_field(name="📋 Sections", value=sections_text, inline=False)
-        
-        embed.set_footer(text="Click the title to view the full page on the OSRS Wiki")
-        await interaction.followup.send(embed=embed)
-        
-    except Exception as e:
-        error_embed = discord.Embed(
-            title="❌ Error",
-            description=f"An error occurred while getting information: {str(e)}",
+    
+    embed.set_footer(text=f"Page {page + 1} • Click on the links to read more on the OSRS Wiki")
+    # Search results have no revision to key on, so they expire with the search cache
+    if not mark_if_stale(embed):
+        embed_cache.set('search', cache_key, embed, ttl=SEARCH_CACHE_TTL)
+    return embed, has_next
+
+class SearchResultsView(discord.ui.View):
+    """Previous/next buttons under a /search reply
+
+    Later pages are only fetched when someone asks for them, and each page
+    is kept on the view, so paging back and forth is free until it times out.
+    """
+
+    def __init__(self, interaction: discord.Interaction, query: str, first_page: discord.Embed):
+        super().__init__(timeout=SEARCH_VIEW_TIMEOUT)
+        # The command's interaction, whose token can still edit the reply when the view expires
+        self.interaction = interaction
+        self.query = query
+        self.page = 0
+        self.pages: Dict[int, Tuple[discord.Embed, bool]] = {0: (first_page, True)}
+        self.update_buttons(True)
+
+    def update_buttons(self, has_next: bool):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = not has_next
+
+    async def show(self, interaction: discord.Interaction, page: int):
+        """Switch the message to a page, fetching it first if this view hasn't yet"""
+        if page not in self.pages:
+            # Fetching may outlast Discord's 3 second limit, so acknowledge the click first
+            await interaction.response.defer()
+            start_deadline(interaction, 'search')
+            try:
+                embed, has_next = await build_search_page(self.query, page)
+            except Exception as e:
+                embed, has_next = discord.Embed(
+                    title="❌ Error",
+                    description=f"An error occurred while searching: {str(e)}",
+                    color=discord.Color.red()
+                ), False
+            else:
+                # Pages cut short by a slow or failing wiki are fetched again next time
+                if not (current_deadline.get().stale or wiki_unavailable()):
+                    self.pages[page] = (embed, has_next)
+        else:
+            embed, has_next = self.pages[page]
+
+        self.page = page
+        self.update_buttons(has_next)
+        if interaction.response.is_done():
+            await interaction.edit_original_response(embed=embed, view=self)
+        else:
+            await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.page - 1)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.primary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.page + 1)
+
+    async def on_timeout(self):
+        """Take the buttons off the message once they stop working"""
+        try:
+            await self.interaction.edit_original_response(view=None)
+        except discord.HTTPException as e:
+            print(f"Error removing search buttons: {e}")
+
+async def build_search_reply(interaction: discord.Interaction, query: str) -> Tuple[discord.Embed, Optional[SearchResultsView]]:
+    """The first /search page, with page buttons when there are more results"""
+    embed, has_next = await build_search_page(query)
+    return embed, SearchResultsView(interaction, query, embed) if has_next else None
+
+@bot.tree.command(name="search", description="Search the Old School RuneScape Wiki")
+async def search_wiki(interaction: discord.Interaction, query: str):
+    """Search the OSRS Wiki for information"""
+    await respond_with_embed(interaction, 'search', build_search_reply(interaction, query),
+                             "An error occurred while searching")
+
+async def build_info_embed(topic: str) -> discord.Embed:
+    """Build the /info embed, reusing a cached render while the page revision is unchanged"""
+    # First search for the topic
+    results = await wiki_searcher.search_wiki(topic, profile='lookup')
+    
+    if not results:
+        if wiki_unavailable():
+            return build_timeout_embed(topic)
+        return discord.Embed(
+            title="❌ Topic Not Found",
+            description=f"Could not find information about '{topic}' on the OSRS Wiki.",
             color=discord.Color.red()
         )
-        await interaction.followup.send(embed=error_embed)
+    
+    # Get the first (most relevant) result
+    best_match = results[0]
+    page_title = best_match.title
+    
+    # Get the plain-text introduction and the section list side by side
+    content, sections = await asyncio.gather(
+        wiki_searcher.get_page_content(page_title, mode='text'),
+        wiki_searcher.get_page_sections(page_title)
+    )
+    
+    if not content:
+        if wiki_unavailable():
+            return build_partial_embed(page_title, "The page introduction")
+        return discord.Embed(
+            title="❌ Content Error",
+            description=f"Could not retrieve content for '{page_title}'.",
+            color=discord.Color.red()
+        )
+
+    cached = embed_cache.get('info', canonical_input(page_title), content.revid)
+    if cached:
+        return cached
+    
+    # Extracts are already plain text
+    text = content.content
+    
+    # Limit text length
+    if len(text) > 1500:
+        text = text[:1500] + "..."
+    
+    # Create embed
+    embed = discord.Embed(
+        title=f"📖 {page_title}",
+        description=text,
+        color=discord.Color.green(),
+        url=f"{OSRS_WIKI_BASE_URL}/{page_title.replace(' ', '_')}"
+    )
+    
+    # Add sections if available
+    if sections:
+        sections_text = "**Available Sections:**\n"
+        for section in sections[:5]:  # Show first 5 sections
+            sections_text += f"• {clean_html(section['line'])}\n"
+        embed.add_field(name="📋 Sections", value=sections_text, inline=False)
+    
+    embed.set_footer(text="Click the title to view the full page on the OSRS Wiki")
+    if not mark_if_stale(embed):
+        embed_cache.set('info', canonical_input(page_title), embed, content.revid)
+    return embed
+
+@bot.tree.command(name="info", description="Get detailed information about a specific OSRS topic")
+async def get_info(interaction: discord.Interaction, topic: str):
+    """Get detailed information about a specific OSRS topic"""
+    await respond_with_embed(interaction, 'info', build_info_embed(topic), "An error occurred while getting information")
 
 @bot.tree.command(name="random", description="Get a random page from the OSRS Wiki")
 async def random_page(interaction: discord.Interaction):
     """Get a random page from the OSRS Wiki"""
+    start_deadline(interaction, 'random')
     await interaction.response.defer()
     
     try:
@@ -314,8 +2735,8 @@ async def random_page(interaction: discord.Interaction):
         
         page_title = random_page_data['title']
         
-        # Get page content
-        content = await wiki_searcher.get_page_content(page_title)
+        # Get a plain-text introduction, already cut to length by the API
+        content = await wiki_searcher.get_page_content(page_title, mode='text', chars=1000)
         
         if not content:
             embed = discord.Embed(
@@ -326,8 +2747,8 @@ async def random_page(interaction: discord.Interaction):
             await interaction.followup.send(embed=embed)
             return
         
-        # Extract and clean content
-        text = clean_html(content['content'])
+        # Extracts are already plain text
+        text = content.content
         
         # Limit text length
         if len(text) > 1000:
@@ -355,6 +2776,7 @@ async def random_page(interaction: discord.Interaction):
 @bot.tree.command(name="recent", description="Show recent changes to the OSRS Wiki")
 async def recent_changes(interaction: discord.Interaction, limit: int = 5):
     """Show recent changes to the OSRS Wiki"""
+    start_deadline(interaction, 'recent')
     await interaction.response.defer()
     
     try:
@@ -385,13 +2807,11 @@ async def recent_changes(interaction: discord.Interaction, limit: int = 5):
         )
         
         for i, change in enumerate(changes, 1):
-            title = change['title']
-            user = change.get('user', 'Unknown')
-            timestamp = change.get('timestamp', 'Unknown')
-            comment = change.get('comment', 'No comment')
+            title = change.title
+            user = change.user
             
             # Clean up comment
-            comment = clean_html(comment)
+            comment = clean_html(change.comment)
             if len(comment) > 100:
                 comment = comment[:100] + "..."
             
@@ -415,55 +2835,121 @@ async def recent_changes(interaction: discord.Interaction, limit: int = 5):
         )
         await interaction.followup.send(embed=error_embed)
 
-@bot.tree.command(name="ai", description="Get AI-enhanced information about an OSRS topic")
-async def ai_info(interaction: discord.Interaction, topic: str):
-    """Get AI-enhanced information about an OSRS topic (requires OpenAI API key)"""
-    if not OPENAI_API_KEY:
-        embed = discord.Embed(
-            title="❌ OpenAI API Key Required",
-            description="This command requires an OpenAI API key to be configured.",
+# /ai context packing: the page is cut into passages of about this many characters,
+# ranked against the question with BM25, and the best ones packed into AI_CONTEXT_TOKENS
+PASSAGE_MAX_CHARS = 600
+CHARS_PER_TOKEN = 4  # Close enough for English prose
+HEADING_PATTERN = re.compile(r'^(=+)\s*(.*?)\s*\1$')
+
+def split_passages(text: str, max_chars: int = PASSAGE_MAX_CHARS) -> List[str]:
+    """Cut page text into passages of whole paragraphs (or sentences), labelled with their section"""
+    passages = []
+    heading = None
+    current = ''
+
+    def flush():
+        nonlocal current
+        if current:
+            passages.append(f"[{heading}] {current}" if heading else current)
+            current = ''
+
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        match = HEADING_PATTERN.match(line)
+        if match:
+            flush()
+            heading = match.group(2)
+            continue
+        # Long paragraphs are cut at sentence ends
+        pieces = re.split(r'(?<=[.!?])\s+', line) if len(line) > max_chars else [line]
+        for piece in pieces:
+            if current and len(current) + len(piece) + 1 > max_chars:
+                flush()
+            current = f"{current} {piece}" if current else piece
+    flush()
+    return passages
+
+def bm25_scores(query: List[str], documents: List[List[str]]) -> np.ndarray:
+    """BM25 score of every tokenized document for the query terms"""
+    lengths = np.array([len(document) for document in documents], dtype=np.float64)
+    if not len(documents) or not lengths.sum():
+        return np.zeros(len(documents))
+    norms = BM25_K1 * (1 - BM25_B + BM25_B * lengths / lengths.mean())
+    counts = [Counter(document) for document in documents]
+
+    scores = np.zeros(len(documents))
+    for term in set(query):
+        tf = np.array([count[term] for count in counts], dtype=np.float64)
+        df = np.count_nonzero(tf)
+        if not df:
+            continue
+        idf = np.log1p((len(documents) - df + 0.5) / (df + 0.5))
+        scores += idf * tf * (BM25_K1 + 1) / (tf + norms)
+    return scores
+
+def pack_context(topic: str, text: str, token_budget: int = AI_CONTEXT_TOKENS) -> str:
+    """The passages most relevant to topic that fit the budget, in page order
+
+    The opening passage always goes first since it says what the page is about.
+    """
+    passages = split_passages(text)
+    if not passages:
+        return ''
+
+    scores = bm25_scores(tokenize(topic), [tokenize(passage) for passage in passages])
+    budget = token_budget * CHARS_PER_TOKEN - len(passages[0])
+    chosen = {0}
+    # Stable sort keeps page order between equal scores. Unmatched passages only pad the
+    # prompt, unless nothing matched at all and page order is the best guess
+    for index in np.argsort(-scores, kind='stable'):
+        if scores[index] <= 0 and scores.any():
+            break
+        if index in chosen or len(passages[index]) > budget:
+            continue
+        chosen.add(int(index))
+        budget -= len(passages[index]) + 2
+    return '\n\n'.join(passages[index] for index in sorted(chosen))
+
+async def build_ai_embed(topic: str) -> discord.Embed:
+    """Build the /ai embed, reusing a cached answer while the page revision is unchanged"""
+    # Get wiki information first
+    results = await wiki_searcher.search_wiki(topic, profile='lookup')
+    
+    if not results:
+        if wiki_unavailable():
+            return build_timeout_embed(topic)
+        return discord.Embed(
+            title="❌ Topic Not Found",
+            description=f"Could not find information about '{topic}' on the OSRS Wiki.",
             color=discord.Color.red()
         )
-        await interaction.response.send_message(embed=embed)
-        return
     
-    await interaction.response.defer()
+    # Get the whole page so the question can be answered from any section
+    best_match = results[0]
+    content = await wiki_searcher.get_page_fulltext(best_match.title)
     
-    try:
-        # Get wiki information first
-        results = await wiki_searcher.search_wiki(topic)
-        
-        if not results:
-            embed = discord.Embed(
-                title="❌ Topic Not Found",
-                description=f"Could not find information about '{topic}' on the OSRS Wiki.",
-                color=discord.Color.red()
-            )
-            await interaction.followup.send(embed=embed)
-            return
-        
-        # Get content from the best match
-        best_match = results[0]
-        content = await wiki_searcher.get_page_content(best_match['title'])
-        
-        if not content:
-            embed = discord.Embed(
-                title="❌ Content Error",
-                description=f"Could not retrieve content for '{best_match['title']}'.",
-                color=discord.Color.red()
-            )
-            await interaction.followup.send(embed=embed)
-            return
-        
-        # Extract text content
-        wiki_text = clean_html(content['content'])
-        
-        # Limit wiki text for API call
-        if len(wiki_text) > 2000:
-            wiki_text = wiki_text[:2000] + "..."
-        
-        # Create AI prompt
-        prompt = f"""Based on the following information from the Old School RuneScape Wiki about '{topic}', provide a clear, concise, and helpful explanation:
+    if not content:
+        if wiki_unavailable():
+            return build_partial_embed(best_match.title, "The wiki text for an AI answer")
+        return discord.Embed(
+            title="❌ Content Error",
+            description=f"Could not retrieve content for '{best_match.title}'.",
+            color=discord.Color.red()
+        )
+
+    # The answer depends on the question as well as the page
+    cache_key = f"{canonical_input(topic)}|{canonical_input(best_match.title)}"
+    cached = embed_cache.get('ai', cache_key, content.revid)
+    if cached:
+        return cached
+    
+    # Only the passages relevant to the question go into the prompt
+    wiki_text = pack_context(topic, content.content)
+    
+    # Create AI prompt
+    prompt = f"""Based on the following information from the Old School RuneScape Wiki about '{topic}', provide a clear, concise, and helpful explanation:
 
 Wiki Information:
 {wiki_text}
@@ -476,86 +2962,111 @@ Please provide:
 
 Format your response in a clear, structured way."""
 
-        # Get AI response using new OpenAI API format
-        try:
-            client = openai.OpenAI(api_key=OPENAI_API_KEY)
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that explains Old School RuneScape topics clearly and concisely."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=500,
-                temperature=0.7
-            )
-        except Exception as ai_error:
-            # Fallback to a simple summary if AI fails
-            print(f"AI API error: {ai_error}")
-            ai_response = f"Here's a summary of {topic}:\n\n{wiki_text[:800]}..."
-            if len(wiki_text) > 800:
-                ai_response += "\n\n[Content truncated due to AI service issues]"
-        else:
-            ai_response = response.choices[0].message.content
-        
-        # Create embed
+    # Get AI response using new OpenAI API format
+    try:
+        # Whatever the wiki lookups left of the budget, up to OpenAI's own limit; on timeout
+        # the request is cancelled
+        async with lane_turn('llm'):
+            limit, deadline_bound = request_limit(OPENAI_REQUEST_TIMEOUT)
+            response = await openai_breaker.call(lambda: asyncio.wait_for(
+                openai_client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=[
+                        {"role": "system", "content": "You are a helpful assistant that explains Old School RuneScape topics clearly and concisely."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=500,
+                    temperature=0.7
+                ),
+                timeout=limit
+            ), deadline_bound)
+    except Exception as ai_error:
+        # Fallback to a simple summary if AI fails
+        print(f"AI API error: {ai_error}")
+        ai_response = f"Here's a summary of {topic}:\n\n{wiki_text[:800]}..."
+        if len(wiki_text) > 800:
+            ai_response += "\n\n[Content truncated due to AI service issues]"
+        ai_succeeded = False
+    else:
+        ai_response = response.choices[0].message.content
+        ai_succeeded = True
+    
+    # Create embed
+    embed = discord.Embed(
+        title=f"🤖 AI Analysis: {best_match.title}",
+        description=ai_response,
+        color=discord.Color.purple(),
+        url=f"{OSRS_WIKI_BASE_URL}/{best_match.title.replace(' ', '_')}"
+    )
+    
+    embed.set_footer(text="AI-powered analysis based on OSRS Wiki data")
+    # Only keep real answers from current data; the rest should be retried next time
+    if not mark_if_stale(embed) and ai_succeeded:
+        embed_cache.set('ai', cache_key, embed, content.revid)
+    return embed
+
+@bot.tree.command(name="ai", description="Get AI-enhanced information about an OSRS topic")
+async def ai_info(interaction: discord.Interaction, topic: str):
+    """Get AI-enhanced information about an OSRS topic (requires OpenAI API key)"""
+    if not OPENAI_API_KEY:
         embed = discord.Embed(
-            title=f"🤖 AI Analysis: {best_match['title']}",
-            description=ai_response,
-            color=discord.Color.purple(),
-            url=f"{OSRS_WIKI_BASE_URL}/{best_match['title'].replace(' ', '_')}"
-        )
-        
-        embed.set_footer(text="AI-powered analysis based on OSRS Wiki data")
-        await interaction.followup.send(embed=embed)
-        
-    except Exception as e:
-        error_embed = discord.Embed(
-            title="❌ Error",
-            description=f"An error occurred while getting AI information: {str(e)}",
+            title="❌ OpenAI API Key Required",
+            description="This command requires an OpenAI API key to be configured.",
             color=discord.Color.red()
         )
-        await interaction.followup.send(embed=error_embed)
+        await interaction.response.send_message(embed=embed)
+        return
+    
+    await respond_with_embed(interaction, 'ai', build_ai_embed(topic), "An error occurred while getting AI information")
 
 @bot.tree.command(name="drops", description="Get drop rates and loot table information for an OSRS monster/item")
 async def get_drops(interaction: discord.Interaction, target: str):
     """Get drop rates and loot table information for an OSRS monster or item"""
-    await interaction.response.defer()
-    
-    try:
-        # First search for the target
-        results = await wiki_searcher.search_wiki(target)
-        
-        if not results:
-            embed = discord.Embed(
-                title="❌ Target Not Found",
-                description=f"Could not find information about '{target}' on the OSRS Wiki.",
-                color=discord.Color.red()
-            )
-            await interaction.followup.send(embed=embed)
-            return
-        
-        # Get the first (most relevant) result
-        best_match = results[0]
-        page_title = best_match['title']
-        
-        # Get detailed content
-        content = await wiki_searcher.get_page_content(page_title)
-        
-        if not content:
+    start_deadline(interaction, 'drops')
+    await interaction.response.defer()
+    
+    try:
+        page_title, records = await load_drop_table(target)
+
+        if not page_title:
+            if wiki_unavailable():
+                await interaction.followup.send(embed=build_timeout_embed(target))
+                return
             embed = discord.Embed(
-                title="❌ Content Error",
-                description=f"Could not retrieve content for '{page_title}'.",
+                title="❌ Target Not Found",
+                description=f"Could not find information about '{target}' on the OSRS Wiki.",
                 color=discord.Color.red()
             )
             await interaction.followup.send(embed=embed)
             return
-        
-        # Extract and clean content
-        text = clean_html(content['content'])
-        
-        # Look for drop rate information
-        drop_info = extract_drop_information(text, page_title)
-        
+
+        if records:
+            # Value each drop from the in-memory price snapshot
+            values = price_index.values_for([record.item for record in records])
+            drop_info = build_drop_information(records, page_title, values)
+        else:
+            # Pages without a drop table (items, quests...) fall back to the introduction,
+            # streamed so a huge page stops downloading once there is enough text
+            content = await wiki_searcher.get_page_content(page_title, mode='stream', chars=DROPS_FALLBACK_CHARS)
+
+            if not content:
+                if wiki_unavailable():
+                    await interaction.followup.send(embed=build_partial_embed(page_title, "The drop table"))
+                    return
+                embed = discord.Embed(
+                    title="❌ Content Error",
+                    description=f"Could not retrieve content for '{page_title}'.",
+                    color=discord.Color.red()
+                )
+                await interaction.followup.send(embed=embed)
+                return
+
+            # Streamed content is already display text
+            text = content.content
+
+            # Look for drop rate information
+            drop_info = extract_drop_information(text, page_title)
+
         if not drop_info:
             # If no specific drop info found, show general page info
             embed = discord.Embed(
@@ -601,6 +3112,7 @@ async def get_drops(interaction: discord.Interaction, target: str):
                 )
         
         embed.set_footer(text="Click the title to view the full page on the OSRS Wiki")
+        mark_if_stale(embed)
         await interaction.followup.send(embed=embed)
         
     except Exception as e:
@@ -611,117 +3123,820 @@ async def get_drops(interaction: discord.Interaction, target: str):
         )
         await interaction.followup.send(embed=error_embed)
 
-def extract_drop_information(text: str, page_title: str) -> Optional[Dict[str, Any]]:
-    """Extract drop rate information from wiki text"""
+async def build_dropped_by_embed(item: str) -> discord.Embed:
+    """Build the /droppedby embed from the local drop table store"""
+    droppers = drop_store.find_droppers(item)
+
+    if not droppers:
+        return discord.Embed(
+            title="❌ No Droppers Found",
+            description=f"No indexed monster drops '{item}'. The drop table store may still be filling up.",
+            color=discord.Color.red()
+        )
+
+    item_name = droppers[0][1].item
+    embed = discord.Embed(
+        title=f"📦 Dropped By: {item_name}",
+        description=f"Monsters that drop {item_name}, most likely first:",
+        color=discord.Color.green(),
+        url=f"{OSRS_WIKI_BASE_URL}/{item_name.replace(' ', '_')}"
+    )
+
+    lines = []
+    for monster, drop in droppers[:15]:
+        monster_url = f"{OSRS_WIKI_BASE_URL}/{monster.replace(' ', '_')}"
+        lines.append(f"[{monster}]({monster_url}) ×{drop.quantity} — {drop.rarity}")
+    if len(droppers) > 15:
+        lines.append(f"... and {len(droppers) - 15} more monsters")
+
+    embed.add_field(name="🎯 Monsters", value="\n".join(lines)[:1024], inline=False)
+    embed.set_footer(text="From the bot's local copy of the OSRS Wiki drop tables")
+    return embed
+
+@bot.tree.command(name="droppedby", description="Find which monsters drop an OSRS item")
+async def dropped_by(interaction: discord.Interaction, item: str):
+    """Find which monsters drop an OSRS item, using the local drop table store"""
+    # Answered from local SQLite, so this replies without deferring
+    await respond_with_embed(interaction, 'droppedby', build_dropped_by_embed(item),
+                             "An error occurred while looking up droppers")
+
+# Drop tables live under a "Drops" (sometimes "Loot") section, not in section 0
+DROPS_SECTION_PATTERN = re.compile(r'\b(drops?|loot)\b', re.IGNORECASE)
+LEVEL2_HEADING_PATTERN = re.compile(r'^==([^=].*?)==\s*$', re.MULTILINE)
+
+# Headings and the drop table templates we care about in the drops wikitext
+DROPS_WIKITEXT_PATTERN = re.compile(
+    r'^(?P<level>={2,6})\s*(?P<heading>.+?)\s*(?P=level)\s*$'
+    r'|\{\{\s*(?P<template>DropsLine|DropsTableHead)\s*(?=[|}])',
+    re.IGNORECASE | re.MULTILINE
+)
+
+def find_template_end(wikitext: str, start: int) -> int:
+    """Return the index just past the template that opens at start, or -1"""
+    depth = 0
+    i = start
+    while i < len(wikitext) - 1:
+        pair = wikitext[i:i + 2]
+        if pair == '{{':
+            depth += 1
+            i += 2
+        elif pair == '}}':
+            depth -= 1
+            i += 2
+            if depth == 0:
+                return i
+        else:
+            i += 1
+    return -1
+
+def split_template_params(template: str) -> Dict[str, str]:
+    """Split a '{{Name|a=b|c}}' template into its named and positional parameters"""
+    parts = []
+    current = []
+    depth = 0
+    body = template[2:-2]
+    i = 0
+    while i < len(body):
+        pair = body[i:i + 2]
+        if pair in ('{{', '[['):
+            depth += 1
+            current.append(pair)
+            i += 2
+            continue
+        if pair in ('}}', ']]'):
+            depth -= 1
+            current.append(pair)
+            i += 2
+            continue
+        if body[i] == '|' and depth == 0:
+            parts.append(''.join(current))
+            current = []
+        else:
+            current.append(body[i])
+        i += 1
+    parts.append(''.join(current))
+
+    # The first part is the template name itself
+    params = {}
+    position = 1
+    for part in parts[1:]:
+        key, sep, value = part.partition('=')
+        if sep:
+            params[key.strip().lower()] = value.strip()
+        else:
+            params[str(position)] = part.strip()
+            position += 1
+    return params
+
+def clean_wikitext(value: str) -> str:
+    """Reduce a wikitext template value to plain display text"""
+    text = re.sub(r'<ref[^>]*/>|<ref[^>]*>.*?</ref>', '', value, flags=re.DOTALL | re.IGNORECASE)
+    # Drop nested templates such as {{Ref|...}} or {{(m)}}
+    while True:
+        stripped = re.sub(r'\{\{[^{}]*\}\}', '', text)
+        if stripped == text:
+            break
+        text = stripped
+    # [[Target|Label]] -> Label, [[Target]] -> Target
+    text = re.sub(r'\[\[(?:[^\]|]*\|)?([^\]]*)\]\]', r'\1', text)
+    text = text.replace("'''", '').replace("''", '')
+    return clean_html(text)
+
+def wikitext_intro(wikitext: str) -> str:
+    """Plain text of a page's lead section, close to what TextExtracts returns"""
+    lead = re.split(r'^=', wikitext, maxsplit=1, flags=re.MULTILINE)[0]
+    # Tables, and images or categories (whose captions may hold links of their own)
+    lead = re.sub(r'\{\|.*?\|\}', '', lead, flags=re.DOTALL)
+    lead = re.sub(r'\[\[(?:File|Image|Category):(?:[^\[\]]|\[\[[^\]]*\]\])*\]\]', '', lead, flags=re.IGNORECASE)
+    return clean_wikitext(lead)
+
+def wikitext_plaintext(wikitext: str) -> str:
+    """Plain text of a whole page with its "== Heading ==" lines, close to the full text extract"""
+    text = re.sub(r'<ref[^>]*/>|<ref[^>]*>.*?</ref>|<!--.*?-->', '', wikitext, flags=re.DOTALL | re.IGNORECASE)
+    # Infoboxes and other templates span lines, so they go before the text is cut into lines
+    while True:
+        stripped = re.sub(r'\{\{[^{}]*\}\}', '', text)
+        if stripped == text:
+            break
+        text = stripped
+    text = re.sub(r'\{\|.*?\|\}', '', text, flags=re.DOTALL)
+    text = re.sub(r'\[\[(?:File|Image|Category):(?:[^\[\]]|\[\[[^\]]*\]\])*\]\]', '', text, flags=re.IGNORECASE)
+    lines = (clean_wikitext(line) for line in text.split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+def drops_section_wikitext(wikitext: str) -> Optional[str]:
+    """The wikitext of a page's first top-level drops section, like get_drops_wikitext"""
+    headings = list(LEVEL2_HEADING_PATTERN.finditer(wikitext))
+    for i, heading in enumerate(headings):
+        if DROPS_SECTION_PATTERN.search(heading.group(1)):
+            end = headings[i + 1].start() if i + 1 < len(headings) else len(wikitext)
+            return wikitext[heading.end():end]
+    return None
+
+def parse_drop_rarity(rarity: str) -> Optional[float]:
+    """Convert a drop table rarity such as '1/128' or 'Always' into a probability"""
+    return rarity_classifier.parse_rate(rarity)
+
+def parse_drops_wikitext(wikitext: str) -> List[DropRow]:
+    """Parse {{DropsLine}} templates from drops section wikitext into drop records"""
+    records = []
+    category = 'Drops'
+
+    for match in DROPS_WIKITEXT_PATTERN.finditer(wikitext):
+        if match.group('heading'):
+            # Sub-headings like "===Weapons and armour===" name the following table
+            category = clean_wikitext(match.group('heading')) or category
+            continue
+
+        end = find_template_end(wikitext, match.start())
+        if end == -1:
+            break
+
+        # DropsTableHead only opens a table; the heading above it names it
+        if match.group('template').lower() != 'dropsline':
+            continue
+
+        params = split_template_params(wikitext[match.start():end])
+        item = clean_wikitext(params.get('name', ''))
+        if not item:
+            continue
+
+        rarity = clean_wikitext(params.get('rarity', ''))
+        records.append(DropRow(
+            item,
+            clean_wikitext(params.get('quantity', '')) or '1',
+            rarity or 'Unknown',
+            parse_drop_rarity(rarity),
+            category
+        ))
+
+    return records
+
+def format_gp(value: float) -> str:
+    """Format a GP amount the way players write it (950, 12.5K, 3.2M, 1.1B)"""
+    for divisor, suffix in ((1_000_000_000, 'B'), (1_000_000, 'M'), (1_000, 'K')):
+        if value >= divisor:
+            return f"{value / divisor:.1f}{suffix}"
+    return f"{value:,.0f}"
+
+def build_drop_information(records: List[DropRow], page_title: str,
+                           values: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """Group parsed drop records into the categories shown by /drops"""
     drop_info = {
         'description': f"Drop rates and loot information for {page_title}",
         'categories': {},
-        'additional_info': ""
+        'additional_info': f"Parsed {len(records)} drop(s) from the wiki drop table"
     }
-    
-    # Common drop categories to look for
-    categories = {
-        'Always': ['always', 'guaranteed', '100%'],
-        'Common': ['common', 'frequent', 'often'],
-        'Uncommon': ['uncommon', 'sometimes', 'occasionally'],
-        'Rare': ['rare', 'uncommon', 'infrequently'],
-        'Very Rare': ['very rare', 'extremely rare', 'very uncommon'],
-        'Special': ['special', 'unique', 'exclusive']
+
+    for i, record in enumerate(records):
+        line = f"{record.item} ×{record.quantity} — {record.rarity}"
+        if values is not None and values[i] > 0:
+            # Value the average quantity of the drop
+            low, high = parse_quantity_range(record.quantity)
+            line += f" • {format_gp(values[i] * (low + high) / 2)} gp"
+        drop_info['categories'].setdefault(record.category, []).append(line)
+
+    return drop_info
+
+class RarityClassifier:
+    """Single-pass drop rarity classifier built from precompiled patterns"""
+
+    # Rarity keywords and the category they imply; multi-word phrases are matched as one token
+    KEYWORDS = {
+        'always': 'Always', 'guaranteed': 'Always',
+        'common': 'Common', 'frequent': 'Common', 'often': 'Common',
+        'uncommon': 'Uncommon', 'sometimes': 'Uncommon', 'occasionally': 'Uncommon',
+        'rare': 'Rare', 'infrequently': 'Rare',
+        'very rare': 'Very Rare', 'extremely rare': 'Very Rare', 'very uncommon': 'Very Rare'
     }
-    
-    # Split text into lines for easier processing
-    lines = text.split('\n')
-    
-    # Look for drop rate patterns
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-            
-        # Look for percentage patterns (e.g., "1/128 (0.78%)")
-        if any(pattern in line.lower() for pattern in ['%', '/', 'drop', 'loot', 'chance']):
-            # Determine category based on rarity
-            category = determine_rarity_category(line)
-            if category:
-                if category not in drop_info['categories']:
-                    drop_info['categories'][category] = []
-                drop_info['categories'][category].append(line)
-    
-    # If no structured drops found, look for general drop mentions
-    if not any(drop_info['categories'].values()):
-        drop_mentions = []
-        for line in lines:
-            if any(word in line.lower() for word in ['drop', 'loot', 'reward', 'item']):
-                drop_mentions.append(line)
-        
-        if drop_mentions:
-            drop_info['categories']['General Drops'] = drop_mentions[:10]  # Limit to 10 mentions
-    
-    # Check if we found any drop information
-    if any(drop_info['categories'].values()):
-        return drop_info
-    
-    return None
+
+    # When a line has several keywords, the first category in this order wins
+    CATEGORY_ORDER = ['Always', 'Common', 'Uncommon', 'Rare', 'Very Rare']
+
+    # Words that make a line worth classifying, and words that count as a general drop mention
+    CANDIDATE_WORDS = ('drop', 'loot', 'chance')
+    MENTION_WORDS = ('drop', 'loot', 'reward', 'item')
+
+    def __init__(self):
+        # Longest alternatives first so "very rare" and "uncommon" beat "rare" and "common"
+        keywords = sorted(self.KEYWORDS, key=len, reverse=True)
+        words = sorted(set(self.CANDIDATE_WORDS + self.MENTION_WORDS), key=len, reverse=True)
+        self.pattern = re.compile(
+            r'(?P<percent>\d+(?:\.\d+)?)\s*%'
+            r'|(?P<numerator>\d[\d,]*(?:\.\d+)?)\s*/\s*(?P<denominator>\d[\d,]*(?:\.\d+)?)'
+            r'|(?P<keyword>' + '|'.join(re.escape(keyword) for keyword in keywords) + r')'
+            r'|(?P<word>' + '|'.join(re.escape(word) for word in words) + r')'
+            r'|(?P<symbol>[%/])'
+            r'|(?P<newline>\n)',
+            re.IGNORECASE
+        )
+        self.keyword_rank = {
+            keyword: self.CATEGORY_ORDER.index(category) for keyword, category in self.KEYWORDS.items()
+        }
+
+    @staticmethod
+    def category_for_rate(rate: float) -> str:
+        """Bucket a drop probability (0-1) into a rarity category"""
+        percentage = rate * 100
+        if percentage >= 100:
+            return 'Always'
+        elif percentage >= 10:
+            return 'Common'
+        elif percentage >= 1:
+            return 'Uncommon'
+        elif percentage >= 0.1:
+            return 'Rare'
+        else:
+            return 'Very Rare'
+
+    def scan(self, text: str) -> Iterator[Dict[str, Any]]:
+        """Scan text once, yielding what was found on each non-empty line"""
+        line_start = 0
+        found = self._new_line_state()
+
+        for match in self.pattern.finditer(text + '\n'):
+            kind = match.lastgroup
+            if kind == 'newline':
+                line = text[line_start:match.start()].strip()
+                if line:
+                    found['line'] = line
+                    found['start'] = line_start
+                    yield found
+                line_start = match.end()
+                found = self._new_line_state()
+            elif kind == 'percent':
+                found['candidate'] = True
+                if found['percent'] is None:
+                    found['percent'] = float(match.group('percent'))
+            elif kind == 'denominator':
+                # A fraction match ends on its denominator group
+                found['candidate'] = True
+                if found['fraction'] is None:
+                    numerator = float(match.group('numerator').replace(',', ''))
+                    denominator = float(match.group('denominator').replace(',', ''))
+                    if denominator > 0:
+                        found['fraction'] = numerator / denominator
+            elif kind == 'keyword':
+                rank = self.keyword_rank[match.group('keyword').lower()]
+                if found['keyword_rank'] is None or rank < found['keyword_rank']:
+                    found['keyword_rank'] = rank
+            elif kind == 'word':
+                word = match.group('word').lower()
+                found['candidate'] = found['candidate'] or word in self.CANDIDATE_WORDS
+                found['mention'] = found['mention'] or word in self.MENTION_WORDS
+            else:
+                found['candidate'] = True
+
+    @staticmethod
+    def _new_line_state() -> Dict[str, Any]:
+        return {
+            'line': '', 'start': 0, 'candidate': False, 'mention': False,
+            'percent': None, 'fraction': None, 'keyword_rank': None
+        }
+
+    def _category(self, found: Dict[str, Any]) -> Optional[str]:
+        """Pick a category from one scanned line: percent, then fraction, then keywords"""
+        if found['percent'] is not None:
+            return self.category_for_rate(found['percent'] / 100)
+        if found['fraction'] is not None:
+            return self.category_for_rate(found['fraction'])
+        if found['keyword_rank'] is not None:
+            return self.CATEGORY_ORDER[found['keyword_rank']]
+        return None
+
+    def classify(self, line: str) -> Optional[str]:
+        """Determine the rarity category of a single line"""
+        for found in self.scan(line.replace('\n', ' ')):
+            return self._category(found)
+        return None
+
+    def parse_rate(self, text: str) -> Optional[float]:
+        """Parse a drop probability (0-1) from a fraction, percentage or 'always'"""
+        for found in self.scan(text.replace('\n', ' ')):
+            if found['fraction'] is not None:
+                return min(found['fraction'], 1.0)
+            if found['percent'] is not None:
+                return min(found['percent'] / 100, 1.0)
+            if found['keyword_rank'] == 0:
+                return 1.0
+        return None
+
+    def extract(self, text: str, page_title: str) -> Optional[Dict[str, Any]]:
+        """Extract drop rate information from wiki text in a single pass"""
+        return self._collect(self.scan(text), page_title)
+
+    def extract_many(self, pages: Iterable[Tuple[str, str]]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Extract drop information from many (title, text) pages, for bulk indexing
+
+        The pages are joined and scanned in one pass; each scanned line is
+        handed back to its page by where it starts in the joined text.
+        """
+        titles, texts, ends = [], [], []
+        end = 0
+        for title, text in pages:
+            titles.append(title)
+            texts.append(text)
+            end += len(text) + 1
+            ends.append(end)
+
+        lines: List[List[Dict[str, Any]]] = [[] for _ in titles]
+        page = 0
+        for found in self.scan('\n'.join(texts)):
+            while found['start'] >= ends[page]:
+                page += 1
+            lines[page].append(found)
+        return {title: self._collect(found, title) for title, found in zip(titles, lines)}
+
+    def _collect(self, scanned: Iterable[Dict[str, Any]], page_title: str) -> Optional[Dict[str, Any]]:
+        """Group one page's scanned lines into rarity categories"""
+        drop_info = {
+            'description': f"Drop rates and loot information for {page_title}",
+            'categories': {},
+            'additional_info': ""
+        }
+        mentions = []
+
+        for found in scanned:
+            if found['candidate']:
+                category = self._category(found)
+                if category:
+                    drop_info['categories'].setdefault(category, []).append(found['line'])
+                    continue
+            # Remember general drop mentions in case nothing structured turns up
+            if found['mention'] and len(mentions) < 10:
+                mentions.append(found['line'])
+
+        if not drop_info['categories'] and mentions:
+            drop_info['categories']['General Drops'] = mentions
+
+        # Check if we found any drop information
+        if drop_info['categories']:
+            return drop_info
+
+        return None
+
+# Shared classifier; the patterns are compiled once at import
+rarity_classifier = RarityClassifier()
+
+def extract_drop_information(text: str, page_title: str) -> Optional[Dict[str, Any]]:
+    """Extract drop rate information from wiki text"""
+    return rarity_classifier.extract(text, page_title)
 
 def determine_rarity_category(line: str) -> Optional[str]:
     """Determine the rarity category based on drop rate information"""
-    line_lower = line.lower()
-    
-    # Look for percentage patterns
-    if '%' in line:
-        # Extract percentage
-        import re
-        percentage_match = re.search(r'(\d+(?:\.\d+)?)\s*%', line)
-        if percentage_match:
-            percentage = float(percentage_match.group(1))
-            
-            if percentage >= 100:
-                return 'Always'
-            elif percentage >= 10:
-                return 'Common'
-            elif percentage >= 1:
-                return 'Uncommon'
-            elif percentage >= 0.1:
-                return 'Rare'
-            else:
-                return 'Very Rare'
-    
-    # Look for fraction patterns (e.g., "1/128")
-    fraction_match = re.search(r'(\d+)/(\d+)', line)
-    if fraction_match:
-        numerator = int(fraction_match.group(1))
-        denominator = int(fraction_match.group(2))
-        if denominator > 0:
-            percentage = (numerator / denominator) * 100
-            
-            if percentage >= 100:
-                return 'Always'
-            elif percentage >= 10:
-                return 'Common'
-            elif percentage >= 1:
-                return 'Uncommon'
-            elif percentage >= 0.1:
-                return 'Rare'
-            else:
-                return 'Very Rare'
-    
-    # Look for rarity keywords
-    if any(word in line_lower for word in ['always', 'guaranteed', '100%']):
-        return 'Always'
-    elif any(word in line_lower for word in ['common', 'frequent', 'often']):
-        return 'Common'
-    elif any(word in line_lower for word in ['uncommon', 'sometimes', 'occasionally']):
-        return 'Uncommon'
-    elif any(word in line_lower for word in ['rare', 'uncommon', 'infrequently']):
-        return 'Rare'
-    elif any(word in line_lower for word in ['very rare', 'extremely rare', 'very uncommon']):
-        return 'Very Rare'
-    
-    return None
+    return rarity_classifier.classify(line)
 
-@bot.tree.command(name="help", description="Show available commands and how to use them")
-async def help_command(interaction: discord.Interaction):
-    """Show help information"""
+# Chances shown by /droprate, and the multiples of the expected kill count for the curve
+DROPRATE_CHANCES = np.array([0.5, 0.9, 0.99])
+DROPRATE_CURVE_MULTIPLES = np.array([0.25, 0.5, 1.0, 2.0, 3.0, 5.0])
+DROPRATE_MAX_ROWS = 14  # Keeps the table inside Discord's 1024 character field limit
+
+def drop_chance_table(rates: np.ndarray, kills: np.ndarray) -> np.ndarray:
+    """Chance of at least one drop for every (rate, kill count) pair, shape (rates, kills)"""
+    rates = np.asarray(rates, dtype=np.float64)[:, None]
+    kills = np.asarray(kills, dtype=np.float64)
+    if kills.ndim == 1:
+        kills = kills[None, :]
+    # 1 - (1 - p)^k, computed via log1p/expm1 so 1/50,000 rates don't lose precision
+    with np.errstate(divide='ignore'):
+        return -np.expm1(kills * np.log1p(-rates))
+
+def kills_for_chance(rates: np.ndarray, chances: np.ndarray) -> np.ndarray:
+    """Kills needed to reach each chance of at least one drop, shape (rates, chances)"""
+    rates = np.asarray(rates, dtype=np.float64)[:, None]
+    chances = np.asarray(chances, dtype=np.float64)[None, :]
+    with np.errstate(divide='ignore'):
+        kills = np.ceil(np.log1p(-chances) / np.log1p(-rates))
+    # Guaranteed drops always take exactly one kill
+    return np.where(rates >= 1.0, 1.0, np.maximum(kills, 1.0))
+
+def expected_kills(rates: np.ndarray) -> np.ndarray:
+    """Expected kills until the first drop; rates must be above zero"""
+    return 1.0 / np.asarray(rates, dtype=np.float64)
+
+def format_kills(kills: float) -> str:
+    """Format a kill count for display"""
+    return f"{kills:,.0f}" if kills < 10_000_000 else "10M+"
+
+async def build_drop_rate_embed(target: str, item: Optional[str]) -> discord.Embed:
+    """Build the /droprate embed for a bare rate or a monster's drop table"""
+    # A bare rate ("1/5000", "0.2%") doesn't need a drop table
+    direct_rate = rarity_classifier.parse_rate(target)
+    if direct_rate is not None and not re.search(r'[a-z]', target, re.IGNORECASE):
+        if direct_rate <= 0:
+            return discord.Embed(
+                title="❌ Drop Never Happens",
+                description=f"A drop rate of {target} never drops, however many kills it takes.",
+                color=discord.Color.red()
+            )
+        page_title = None
+        names = [target]
+        rates = np.array([direct_rate])
+    else:
+        page_title, records = await load_drop_table(target)
+        # Guaranteed drops have nothing to work out, and zero rates (0/128) never happen
+        rows = [record for record in records if record.rate is not None and 0.0 < record.rate < 1.0]
+        if item:
+            rows = [record for record in rows if item.lower() in record.item.lower()]
+
+        if not rows:
+            return discord.Embed(
+                title="❌ No Drop Rates Found",
+                description=f"Could not find drop rates for '{item or target}'"
+                            + (f" on {page_title}." if page_title else " on the OSRS Wiki."),
+                color=discord.Color.red()
+            )
+
+        # Rarest drops are the ones people ask about
+        rows.sort(key=lambda record: record.rate)
+        names = [record.item for record in rows]
+        rates = np.array([record.rate for record in rows])
+
+    # One vectorized pass over every drop in the table
+    expected = expected_kills(rates)
+    needed = kills_for_chance(rates, DROPRATE_CHANCES)
+
+    embed = discord.Embed(
+        title=f"🎲 Drop Chances: {page_title or target}",
+        description="Kills needed for a 50%, 90% and 99% chance of at least one drop:",
+        color=discord.Color.gold(),
+        url=f"{OSRS_WIKI_BASE_URL}/{page_title.replace(' ', '_')}" if page_title else None
+    )
+
+    lines = [f"{'Item':<20} {'Rate':>9} {'Avg':>7} {'50%':>7} {'90%':>7} {'99%':>7}"]
+    for i, name in enumerate(names[:DROPRATE_MAX_ROWS]):
+        rate_text = f"1/{expected[i]:,.0f}" if expected[i] >= 1.5 else f"{rates[i]:.0%}"
+        lines.append(
+            f"{name[:20]:<20} {rate_text:>9} {format_kills(expected[i]):>7} "
+            + " ".join(f"{format_kills(kills):>7}" for kills in needed[i])
+        )
+    embed.add_field(name="📊 Kill Counts", value="```\n" + "\n".join(lines) + "\n```", inline=False)
+    if len(names) > DROPRATE_MAX_ROWS:
+        embed.add_field(
+            name="ℹ️ Additional Info",
+            value=f"... and {len(names) - DROPRATE_MAX_ROWS} more drops",
+            inline=False
+        )
+
+    # For a single drop, show how the chance grows around the expected kill count
+    if len(names) == 1:
+        curve_kills = np.maximum(np.round(expected[0] * DROPRATE_CURVE_MULTIPLES), 1)
+        curve = drop_chance_table(rates, curve_kills)[0]
+        embed.add_field(
+            name="📈 Chance Curve",
+            value="\n".join(
+                f"{format_kills(kills)} kills: **{chance:.1%}**" for kills, chance in zip(curve_kills, curve)
+            ),
+            inline=False
+        )
+
+    embed.set_footer(text="Chances assume each kill is an independent roll")
+    mark_if_stale(embed)
+    return embed
+
+@bot.tree.command(name="droprate", description="How many kills until you have a good chance at a drop")
+async def drop_rate(interaction: discord.Interaction, target: str, item: Optional[str] = None):
+    """Show kill counts and chances for a drop rate like 1/512, or for a monster's drop table"""
+    # Bare rates and stored drop tables reply at once; a wiki fetch defers first
+    await respond_with_embed(interaction, 'droprate', build_drop_rate_embed(target, item),
+                             "An error occurred while calculating drop chances")
+
+# Drop table sub-tables rolled independently of the main table on every kill
+TERTIARY_CATEGORY_PATTERN = re.compile(r'tertiar|pre-roll|pets?\b|clue|catacombs|wilderness', re.IGNORECASE)
+
+SIMULATION_TRIALS = 1000  # Independent runs of N kills used for the percentiles
+SIMULATION_MAX_KILLS = 100_000
+SIMULATION_EXACT_DROPS = 32  # Ranged quantities of up to this many drops are summed draw by draw
+SIMULATION_PERCENTILES = np.array([5, 25, 50, 75, 95])
+
+def parse_quantity_range(quantity: str) -> Tuple[int, int]:
+    """Convert a drop quantity such as '10–15' or '60 (noted)' into (low, high)"""
+    numbers = [int(number.replace(',', '')) for number in re.findall(r'\d[\d,]*', quantity)]
+    if not numbers:
+        return 1, 1
+    return min(numbers), max(numbers)
+
+class LootSimulator:
+    """Vectorized Monte Carlo simulation of a monster's drop table"""
+
+    def __init__(self, records: List[DropRow], values: Optional[np.ndarray] = None):
+        rows = [record for record in records if record.rate is not None]
+        self.items = [record.item for record in rows]
+        rates = np.array([record.rate for record in rows], dtype=np.float64)
+
+        quantities = np.array([parse_quantity_range(record.quantity) for record in rows], dtype=np.int64)
+        self.quantity_low = quantities[:, 0] if rows else np.zeros(0, dtype=np.int64)
+        self.quantity_width = (quantities[:, 1] - quantities[:, 0]) if rows else np.zeros(0, dtype=np.int64)
+        self.values = np.zeros(len(rows)) if values is None else np.asarray(values, dtype=np.float64)
+
+        # Guaranteed drops land every kill, tertiary drops roll on their own,
+        # and everything else shares the single main table roll
+        self.always = rates >= 1.0
+        self.tertiary = ~self.always & np.array(
+            [bool(TERTIARY_CATEGORY_PATTERN.search(record.category)) for record in rows], dtype=bool
+        )
+        self.main = ~self.always & ~self.tertiary
+        self.tertiary_rates = rates[self.tertiary]
+
+        main_rates = rates[self.main]
+        if main_rates.sum() > 1.0:
+            # Sub-tables that overlap (or approximate rates) can't exceed one roll
+            main_rates = main_rates / main_rates.sum()
+        # The last slot is "nothing from the main table"
+        self.main_probabilities = np.append(main_rates, max(0.0, 1.0 - main_rates.sum()))
+
+    @staticmethod
+    def ranged_extras(rng: np.random.Generator, counts: np.ndarray, widths: np.ndarray) -> np.ndarray:
+        """Sum of counts uniform draws from 0..width for every (run, item) cell
+
+        Cells with few drops are drawn exactly; larger sums use their normal
+        approximation, so the cost doesn't grow with the number of kills.
+        """
+        widths = np.broadcast_to(widths, counts.shape)
+        extras = np.zeros(counts.shape, dtype=np.int64)
+
+        small = (counts > 0) & (counts <= SIMULATION_EXACT_DROPS)
+        if small.any():
+            draws = rng.integers(0, widths[small][:, None] + 1, size=(int(small.sum()), SIMULATION_EXACT_DROPS))
+            used = np.arange(SIMULATION_EXACT_DROPS) < counts[small][:, None]
+            extras[small] = (draws * used).sum(axis=1)
+
+        large = counts > SIMULATION_EXACT_DROPS
+        if large.any():
+            n = counts[large].astype(np.float64)
+            w = widths[large].astype(np.float64)
+            # A uniform draw from 0..w has mean w/2 and variance ((w+1)^2 - 1)/12
+            sums = rng.normal(n * w / 2, np.sqrt(n * ((w + 1) ** 2 - 1) / 12))
+            extras[large] = np.clip(np.rint(sums), 0, n * w).astype(np.int64)
+        return extras
+
+    def simulate(self, kills: int, trials: int = SIMULATION_TRIALS, seed: Optional[int] = None) -> Dict[str, Any]:
+        """Simulate `trials` independent runs of `kills` kills"""
+        rng = np.random.default_rng(seed)
+        counts = np.zeros((trials, len(self.items)), dtype=np.int64)
+
+        # Drop counts per run: always drops, one multinomial main roll per kill,
+        # and an independent binomial per tertiary drop
+        counts[:, self.always] = kills
+        counts[:, self.main] = rng.multinomial(kills, self.main_probabilities, size=trials)[:, :-1]
+        counts[:, self.tertiary] = rng.binomial(kills, self.tertiary_rates, size=(trials, self.tertiary_rates.size))
+
+        # Total quantity: every drop gives the low end plus a uniform extra for ranged quantities
+        totals = counts * self.quantity_low
+        ranged = np.flatnonzero(self.quantity_width)
+        if ranged.size:
+            totals[:, ranged] += self.ranged_extras(rng, counts[:, ranged], self.quantity_width[ranged])
+
+        loot_values = totals @ self.values
+        unique_counts = (counts > 0).sum(axis=1)
+
+        return {
+            'kills': kills,
+            'trials': trials,
+            'items': self.items,
+            'mean_quantities': totals.mean(axis=0),
+            'hit_chances': (counts > 0).mean(axis=0),
+            'value_percentiles': np.percentile(loot_values, SIMULATION_PERCENTILES),
+            'unique_percentiles': np.percentile(unique_counts, SIMULATION_PERCENTILES)
+        }
+
+@bot.tree.command(name="simulate", description="Simulate the loot from killing an OSRS monster N times")
+async def simulate_loot(interaction: discord.Interaction, monster: str, kills: int = 1000, seed: Optional[int] = None):
+    """Simulate the loot from killing a monster N times using its wiki drop table"""
+    start_deadline(interaction, 'simulate')
+    await interaction.response.defer()
+
+    try:
+        # Limit the number of kills
+        kills = max(1, min(kills, SIMULATION_MAX_KILLS))
+
+        page_title, records = await load_drop_table(monster)
+        simulator = LootSimulator(records)
+        simulator.values = price_index.values_for(simulator.items)
+
+        if not simulator.items:
+            embed = discord.Embed(
+                title="❌ No Drop Table Found",
+                description=f"Could not find a drop table for '{monster}' on the OSRS Wiki.",
+                color=discord.Color.red()
+            )
+            await interaction.followup.send(embed=embed)
+            return
+
+        # Large runs take a while; keep them off the event loop
+        result = await asyncio.to_thread(simulator.simulate, kills, seed=seed)
+
+        embed = discord.Embed(
+            title=f"⚔️ Loot Simulation: {kills:,} × {page_title}",
+            description=f"Results across {result['trials']:,} simulated runs of {kills:,} kills:",
+            color=discord.Color.dark_gold(),
+            url=f"{OSRS_WIKI_BASE_URL}/{page_title.replace(' ', '_')}"
+        )
+
+        percentile_names = [f"p{percentile}" for percentile in SIMULATION_PERCENTILES]
+        embed.add_field(
+            name="🧮 Unique Items",
+            value=" • ".join(
+                f"{name}: **{count:.0f}**" for name, count in zip(percentile_names, result['unique_percentiles'])
+            ),
+            inline=False
+        )
+
+        if result['value_percentiles'].any():
+            embed.add_field(
+                name="💰 Loot Value",
+                value=" • ".join(
+                    f"{name}: **{value:,.0f} gp**" for name, value in zip(percentile_names, result['value_percentiles'])
+                ),
+                inline=False
+            )
+
+        # Most plentiful loot on average
+        top = np.argsort(-result['mean_quantities'])[:8]
+        embed.add_field(
+            name="📦 Average Loot",
+            value="\n".join(f"{result['items'][i]} ×{result['mean_quantities'][i]:,.0f}" for i in top),
+            inline=False
+        )
+
+        # How often the rarest drops showed up at all
+        rare = np.argsort(result['hit_chances'])[:6]
+        embed.add_field(
+            name="🍀 Rare Drop Chances",
+            value="\n".join(f"{result['items'][i]}: {result['hit_chances'][i]:.1%} of runs" for i in rare),
+            inline=False
+        )
+
+        embed.set_footer(text="Simulated from the OSRS Wiki drop table" + (f" • seed {seed}" if seed is not None else ""))
+        mark_if_stale(embed)
+        await interaction.followup.send(embed=embed)
+
+    except Exception as e:
+        error_embed = discord.Embed(
+            title="❌ Error",
+            description=f"An error occurred while simulating loot: {str(e)}",
+            color=discord.Color.red()
+        )
+        await interaction.followup.send(embed=error_embed)
+
+async def build_price_embed(item: str) -> discord.Embed:
+    """Build the /price embed from the in-memory price snapshot"""
+    # The snapshot normally refreshes in the background; only the first lookup waits
+    if price_index.updated_at is None:
+        await price_index.refresh()
+
+    if price_index.updated_at is None:
+        # Without a snapshot every item would look unknown
+        return discord.Embed(
+            title="⏳ Prices Unavailable",
+            description="Grand Exchange prices couldn't be loaded from the OSRS Wiki right now. Please try again shortly.",
+            color=discord.Color.orange()
+        )
+
+    item_id = price_index.lookup_id(item)
+
+    if item_id is None:
+        return discord.Embed(
+            title="❌ Item Not Found",
+            description=f"Could not find a Grand Exchange item called '{item}'.",
+            color=discord.Color.red()
+        )
+
+    price = price_index.get_price(item_id)
+    embed = discord.Embed(
+        title=f"💰 {price['name']}",
+        description="Latest Grand Exchange prices from the OSRS Wiki:",
+        color=discord.Color.gold(),
+        url=f"{OSRS_WIKI_BASE_URL}/{price['name'].replace(' ', '_')}"
+    )
+
+    for label, key in (("📈 Instant Buy", 'high'), ("📉 Instant Sell", 'low')):
+        if price[key]:
+            embed.add_field(
+                name=label,
+                value=f"**{price[key]:,} gp**\n<t:{price[key + '_time']}:R>",
+                inline=True
+            )
+        else:
+            embed.add_field(name=label, value="No recent trades", inline=True)
+
+    embed.add_field(name="📦 Buy Limit", value=f"{price['limit']:,}" if price['limit'] else "Unknown", inline=True)
+    embed.add_field(name="✨ High Alch", value=f"{price['highalch']:,} gp", inline=True)
+    embed.add_field(name="🏪 Store Value", value=f"{price['value']:,} gp", inline=True)
+    embed.add_field(name="⭐ Members", value="Yes" if price['members'] else "No", inline=True)
+
+    embed.set_footer(text="Prices from the OSRS Wiki real-time price API")
+    return embed
+
+@bot.tree.command(name="price", description="Get the current Grand Exchange price of an OSRS item")
+async def get_price(interaction: discord.Interaction, item: str):
+    """Get the current Grand Exchange price of an OSRS item from the price snapshot"""
+    # A memory read once the snapshot is loaded, so this replies without deferring
+    await respond_with_embed(interaction, 'price', build_price_embed(item),
+                             "An error occurred while getting the price")
+
+BREAKER_STATE_ICONS = {'closed': '🟢', 'half_open': '🟡', 'open': '🔴'}
+LANE_LABELS = {'network': '🌐 Network Lane', 'llm': '🤖 LLM Lane'}
+
+def format_megabytes(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f} MB"
+
+def build_status_embed() -> discord.Embed:
+    """Build the /status embed from the circuit breakers, command queue, caches and payload sizes"""
+    embed = discord.Embed(
+        title="🩺 Bot Status",
+        description="Health of the services the bot depends on",
+        color=discord.Color.blue()
+    )
+
+    for breaker in (wiki_searcher.breaker, openai_breaker):
+        state = breaker.snapshot()
+        lines = [f"{BREAKER_STATE_ICONS[state['state']]} {state['state'].replace('_', '-')}",
+                 f"{state['failures']}/{state['calls']} recent calls failed"]
+        if state['state'] == 'open':
+            lines.append(f"Next probe in {state['retry_in']:.0f}s")
+        if state['rejected']:
+            lines.append(f"{state['rejected']} call(s) refused while open")
+        embed.add_field(name=breaker.name, value="\n".join(lines), inline=True)
+
+    for lane, scheduler in LANES.items():
+        queue = scheduler.snapshot()
+        lines = [f"{queue['running']}/{queue['concurrency']} running", f"{queue['queued']} queued"]
+        if queue['queued']:
+            lines.append("Busiest: " + ", ".join(f"{depth} waiting" for _, depth in queue['busiest']))
+        embed.add_field(name=LANE_LABELS[lane], value="\n".join(lines), inline=True)
+
+    embed.add_field(
+        name="Caches",
+        value="\n".join([
+            f"{len(cache)} {label} ({format_megabytes(cache.bytes)} of {format_megabytes(cache.max_bytes)}, "
+            f"{cache.raw_bytes / cache.bytes if cache.bytes else 1:.1f}x compressed)"
+            for label, cache in (('wiki entries', wiki_searcher.cache), ('rendered embeds', embed_cache.cache))
+        ] + [f"{len(page_texts)} archived page texts", f"{len(title_table)} interned titles"]),
+        inline=True
+    )
+
+    # Average response size and JSON decode time per call site, to see what each command costs
+    payloads = sorted(wiki_searcher.payload_stats.items(), key=lambda item: -item[1]['bytes'])
+    if payloads:
+        embed.add_field(
+            name="Wiki Payloads",
+            value="\n".join(
+                f"`{call_site}`: {stats['calls']} calls, {stats['bytes'] / stats['calls'] / 1024:.1f} KB "
+                f"and {stats['decode_seconds'] / stats['calls'] * 1000:.2f} ms decode each"
+                for call_site, stats in payloads[:10]
+            )[:1024],
+            inline=False
+        )
+    return embed
+
+@bot.tree.command(name="status", description="Show the health of the wiki and OpenAI connections")
+async def status(interaction: discord.Interaction):
+    """Show circuit breaker states and cache sizes"""
+    await interaction.response.send_message(embed=build_status_embed())
+
+def build_help_embed() -> discord.Embed:
+    """Build the help embed"""
     embed = discord.Embed(
         title="🤖 OSRS Wiki Bot Help",
         description="This bot helps you search and get information from the Old School RuneScape Wiki!",
@@ -764,6 +3979,36 @@ async def help_command(interaction: discord.Interaction):
         inline=False
     )
     
+    embed.add_field(
+        name="🔎 /droppedby [item]",
+        value="Find which monsters drop an OSRS item",
+        inline=False
+    )
+    
+    embed.add_field(
+        name="🎲 /droprate [target] [item]",
+        value="Kills needed for a 50/90/99% chance at a drop, e.g. `1/512` or a monster's table",
+        inline=False
+    )
+    
+    embed.add_field(
+        name="⚔️ /simulate [monster] [kills]",
+        value="Simulate the loot from killing a monster N times (default: 1000)",
+        inline=False
+    )
+    
+    embed.add_field(
+        name="💰 /price [item]",
+        value="Get the current Grand Exchange price of an item",
+        inline=False
+    )
+    
+    embed.add_field(
+        name="🩺 /status",
+        value="Show whether the wiki and OpenAI are reachable",
+        inline=False
+    )
+    
     embed.add_field(
         name="🔄 /sync",
         value="Sync bot commands (Admin only)",
@@ -784,13 +4029,25 @@ async def help_command(interaction: discord.Interaction):
 • `/random`
 • `/recent 8`
 • `/ai money making`
+• `/droppedby dragon med helm`
+• `/droprate abyssal demon abyssal whip`
+• `/simulate abyssal demon 5000`
+• `/price abyssal whip`
 • `/info quest guide`
         """,
         inline=False
     )
     
     embed.set_footer(text="Data sourced from the official Old School RuneScape Wiki")
-    await interaction.response.send_message(embed=embed)
+    return embed
+
+# The help text never changes, so it is built once at startup
+HELP_EMBED = build_help_embed()
+
+@bot.tree.command(name="help", description="Show available commands and how to use them")
+async def help_command(interaction: discord.Interaction):
+    """Show help information"""
+    await interaction.response.send_message(embed=HELP_EMBED)
 
 @bot.tree.command(name="sync", description="Sync bot commands (Admin only)")
 async def sync_commands(interaction: discord.Interaction):
@@ -844,9 +4101,24 @@ async def on_command_error(ctx, error):
 # Cleanup on bot shutdown
 @bot.event
 async def on_close():
+    for task in background_tasks:
+        task.cancel()
     await wiki_searcher.close()
+    await price_index.close()
+    drop_store.close()
+    page_store.close()
 
 if __name__ == "__main__":
+    if sys.argv[1:] == ['build-index']:
+        asyncio.run(build_search_index())
+        sys.exit(0)
+    if len(sys.argv) == 3 and sys.argv[1] == 'ingest':
+        ingest_dump(sys.argv[2])
+        sys.exit(0)
+    if sys.argv[1:] == ['sync']:
+        asyncio.run(run_page_sync())
+        sys.exit(0)
+
     if not DISCORD_TOKEN:
         print("Error: DISCORD_TOKEN not found in environment variables!")
         print("Please create a .env file with your Discord bot token.")
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# bot_simple opens its stores at import, so point them at a scratch directory first
+_data_dir = tempfile.mkdtemp(prefix='osrsbot-tests-')
+os.environ.setdefault('DROPS_DB_PATH', os.path.join(_data_dir, 'drops.db'))
+os.environ.setdefault('PAGE_STORE_PATH', os.path.join(_data_dir, 'pages.db'))
+os.environ.setdefault('PAGE_TEXT_PATH', os.path.join(_data_dir, 'page_text.bin'))
+os.environ.setdefault('SEARCH_INDEX_PATH', os.path.join(_data_dir, 'search_index'))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
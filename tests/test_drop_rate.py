@@ -0,0 +1,41 @@
+import asyncio
+import warnings
+
+import numpy as np
+
+from bot_simple import DropRow, build_drop_rate_embed, drop_store, expected_kills, kills_for_chance
+
+def build(target, item=None):
+    # Divide-by-zero and similar NumPy warnings would mean a bad rate reached the maths
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        return asyncio.run(build_drop_rate_embed(target, item))
+
+def test_kill_counts_for_a_rate():
+    assert expected_kills(np.array([1 / 512]))[0] == 512
+    np.testing.assert_array_equal(kills_for_chance(np.array([1 / 512, 1.0]), np.array([0.5, 0.9])),
+                                  [[355, 1178], [1, 1]])
+
+def test_bare_rate():
+    embed = build('1/512')
+    assert embed.title == "🎲 Drop Chances: 1/512"
+    assert "1/512" in embed.fields[0].value
+    assert embed.fields[-1].name == "📈 Chance Curve"
+
+def test_zero_bare_rate_is_rejected():
+    for target in ('0%', '0/128'):
+        embed = build(target)
+        assert embed.title == "❌ Drop Never Happens"
+        assert not embed.fields
+
+def test_zero_and_guaranteed_rates_are_left_out_of_a_table():
+    drop_store.save_drops('Test goblin', 1, [
+        DropRow('Bones', '1', 'Always', 1.0, '100%'),
+        DropRow('Goblin mail', '1', '5/128', 5 / 128, 'Armour'),
+        DropRow('Removed item', '1', '0/128', 0.0, 'Other'),
+    ])
+    embed = build('Test goblin')
+    table = embed.fields[0].value
+    assert 'Goblin mail' in table
+    assert 'Removed item' not in table and 'Bones' not in table
+    assert 'inf' not in table
@@ -0,0 +1,66 @@
+import time
+
+import numpy as np
+
+from bot_simple import SIMULATION_PERCENTILES, DropRow, LootSimulator
+
+def small_table():
+    return [
+        DropRow('Bones', '1', 'Always', 1.0, 'Always'),
+        DropRow('Coins', '10–20', '1/2', 0.5, 'Weapons and armour'),
+        DropRow('Iron dagger', '1', '1/4', 0.25, 'Weapons and armour'),
+        DropRow('Clue scroll (easy)', '1', '1/64', 1 / 64, 'Tertiary'),
+    ]
+
+def test_same_seed_gives_same_result():
+    simulator = LootSimulator(small_table(), values=np.array([100.0, 1.0, 30.0, 0.0]))
+    first = simulator.simulate(500, seed=1234)
+    second = simulator.simulate(500, seed=1234)
+    for key in ('mean_quantities', 'hit_chances', 'value_percentiles', 'unique_percentiles'):
+        np.testing.assert_array_equal(first[key], second[key])
+    other = simulator.simulate(500, seed=4321)
+    assert not np.array_equal(first['mean_quantities'], other['mean_quantities'])
+
+def test_guaranteed_drops_are_exact():
+    simulator = LootSimulator(
+        [DropRow('Bones', '1', 'Always', 1.0, 'Always'), DropRow('Ashes', '2', 'Always', 1.0, 'Always')],
+        values=np.array([100.0, 5.0])
+    )
+    result = simulator.simulate(10, trials=50, seed=0)
+    np.testing.assert_array_equal(result['value_percentiles'], np.full(len(SIMULATION_PERCENTILES), 10 * 110.0))
+    np.testing.assert_array_equal(result['unique_percentiles'], np.full(len(SIMULATION_PERCENTILES), 2))
+    np.testing.assert_array_equal(result['mean_quantities'], [10, 20])
+
+def test_percentiles_and_unique_counts_on_small_table():
+    kills = 200
+    simulator = LootSimulator(small_table(), values=np.array([0.0, 1.0, 0.0, 0.0]))
+    result = simulator.simulate(kills, seed=7)
+
+    # Coins land on about half the kills, 10-20 at a time
+    values = result['value_percentiles']
+    assert np.all(np.diff(values) >= 0)
+    assert 10 * 0.4 * kills <= values[0] and values[-1] <= 20 * 0.6 * kills
+    assert abs(result['mean_quantities'][1] - 15 * 0.5 * kills) < 0.05 * 15 * 0.5 * kills
+
+    # Bones, coins and daggers are all but certain; the 1/64 clue usually shows up
+    uniques = result['unique_percentiles']
+    assert np.all(np.diff(uniques) >= 0)
+    assert uniques[0] >= 3 and uniques[-1] == 4
+    assert result['hit_chances'][0] == 1.0
+    assert 0.9 < result['hit_chances'][3] < 1.0
+
+def test_ten_thousand_kills_run_in_tens_of_milliseconds():
+    records = [
+        DropRow(f"Item {i}", f"{i + 1}–{5 * (i + 1)}", f"1/{8 * (i + 1)}", 1 / (8 * (i + 1)), 'Main')
+        for i in range(40)
+    ] + [DropRow('Bones', '1', 'Always', 1.0, 'Always'), DropRow('Pet', '1', '1/5000', 1 / 5000, 'Tertiary')]
+    simulator = LootSimulator(records, values=np.arange(len(records), dtype=np.float64))
+    simulator.simulate(100, seed=0)
+
+    # Best of a few runs, so a busy machine doesn't fail the check
+    elapsed = []
+    for seed in range(3):
+        started = time.perf_counter()
+        simulator.simulate(10_000, seed=seed)
+        elapsed.append(time.perf_counter() - started)
+    assert min(elapsed) < 0.1
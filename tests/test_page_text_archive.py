@@ -0,0 +1,58 @@
+import os
+import threading
+
+import pytest
+
+from bot_simple import PageTextArchive, encode_page_text
+
+def pages(prefix, count):
+    return [(f"{prefix} {i}", i + 1, lambda i=i: encode_page_text(f"{prefix} text {i} " * 40)) for i in range(count)]
+
+def test_write_and_read_back(tmp_path):
+    path = str(tmp_path / 'page_text.bin')
+    assert PageTextArchive.write(path, pages('Page', 50), built_at=1700000000.0) == 50
+
+    archive = PageTextArchive(path, max_age=float('inf'))
+    assert len(archive) == 50
+    summary = archive.get('Page 7')
+    assert summary.title == 'Page 7' and summary.revid == 8
+    assert summary.content.startswith('Page text 7 ')
+    assert archive.get('page 7') is None
+    assert archive.mapping.built_at == 1700000000.0
+    assert os.listdir(tmp_path) == ['page_text.bin']
+
+def test_concurrent_writers_leave_a_whole_archive(tmp_path):
+    path = str(tmp_path / 'page_text.bin')
+    errors = []
+
+    def pack(prefix):
+        try:
+            for _ in range(5):
+                PageTextArchive.write(path, pages(prefix, 300))
+        except Exception as e:
+            errors.append(e)
+
+    writers = [threading.Thread(target=pack, args=(prefix,)) for prefix in ('Alpha', 'Beta', 'Gamma')]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    assert errors == []
+    archive = PageTextArchive(path, max_age=float('inf'))
+    prefix = archive.mapping.titles[0].split()[0]
+    assert len(archive) == 300
+    assert all(archive.get(f"{prefix} {i}").content.startswith(f"{prefix} text {i} ") for i in range(300))
+    assert os.listdir(tmp_path) == ['page_text.bin']
+
+def test_failed_write_keeps_the_old_archive(tmp_path):
+    path = str(tmp_path / 'page_text.bin')
+    PageTextArchive.write(path, pages('Page', 3))
+
+    def broken():
+        raise RuntimeError("page store went away")
+
+    with pytest.raises(RuntimeError):
+        PageTextArchive.write(path, pages('Other', 2) + [('Broken', 1, broken)])
+    assert PageTextArchive(path, max_age=float('inf')).get('Page 2') is not None
+    assert os.listdir(tmp_path) == ['page_text.bin']
@@ -0,0 +1,92 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from bot_simple import GEPriceIndex
+
+MAPPING = [
+    {'id': 2, 'name': 'Cannonball', 'members': True, 'limit': 11000, 'value': 5, 'highalch': 3},
+    {'id': 995, 'name': 'Coins', 'members': False, 'value': 1, 'highalch': 0},
+    {'id': 1215, 'name': 'Dragon dagger', 'members': True, 'limit': 70, 'value': 30000, 'highalch': 18000},
+    {'id': 5698, 'name': 'Dragon dagger(p++)', 'members': True, 'limit': 70, 'value': 30000, 'highalch': 18000},
+]
+LATEST = {'data': {
+    '2': {'high': 190, 'highTime': 1700000100, 'low': 180, 'lowTime': 1700000000},
+    '1215': {'high': 17500, 'highTime': 1700000200, 'low': None, 'lowTime': None},
+    '99999': {'high': 1, 'highTime': 1, 'low': 1, 'lowTime': 1},
+}}
+
+def price_app(calls, status=200):
+    """A stand-in for the wiki's bulk price API that counts the requests per endpoint"""
+    async def mapping(request):
+        calls['mapping'] += 1
+        await asyncio.sleep(0.05)
+        return web.json_response(MAPPING, status=status)
+
+    async def latest(request):
+        calls['latest'] += 1
+        return web.json_response(LATEST, status=status)
+
+    app = web.Application()
+    app.router.add_get('/mapping', mapping)
+    app.router.add_get('/latest', latest)
+    return app
+
+async def run_with_prices(scenario, status=200):
+    calls = {'mapping': 0, 'latest': 0}
+    server = TestServer(price_app(calls, status))
+    await server.start_server()
+    index = GEPriceIndex(base_url=f"http://{server.host}:{server.port}")
+    try:
+        return await scenario(index), calls
+    finally:
+        await index.close()
+        await server.close()
+
+def test_refresh_fills_tables_and_lookups():
+    async def scenario(index):
+        assert await index.refresh()
+        return index
+
+    index, calls = asyncio.run(run_with_prices(scenario))
+    assert calls == {'mapping': 1, 'latest': 1}
+    assert index.updated_at is not None
+
+    assert index.lookup_id('cannonball') == 2
+    assert index.lookup_id('  Coins ') == 995
+    # Prefix matches prefer the shortest name, then substrings are tried
+    assert index.lookup_id('dragon dag') == 1215
+    assert index.lookup_id('nnonbal') == 2
+    assert index.lookup_id('abyssal whip') is None
+
+    price = index.get_price(2)
+    assert price['name'] == 'Cannonball'
+    assert (price['high'], price['low'], price['high_time']) == (190, 180, 1700000100)
+    assert (price['limit'], price['value'], price['highalch'], price['members']) == (11000, 5, 3, True)
+    assert index.get_price(1215)['low'] is None
+    assert index.get_price(995)['high'] is None
+
+def test_values_for_uses_mid_then_one_side_then_store_value():
+    async def scenario(index):
+        await index.refresh()
+        return index.values_for(['Cannonball', 'dragon dagger', 'Coins', 'Abyssal whip'])
+
+    values, _ = asyncio.run(run_with_prices(scenario))
+    assert values.tolist() == [185.0, 17500.0, 1.0, 0.0]
+
+def test_concurrent_refreshes_share_one_download():
+    async def scenario(index):
+        return await asyncio.gather(index.refresh(), index.refresh(), index.refresh())
+
+    results, calls = asyncio.run(run_with_prices(scenario))
+    assert results == [True, True, True]
+    assert calls == {'mapping': 1, 'latest': 1}
+
+def test_failed_refresh_leaves_no_snapshot():
+    async def scenario(index):
+        return await index.refresh(), index.updated_at
+
+    (refreshed, updated_at), _ = asyncio.run(run_with_prices(scenario, status=503))
+    assert not refreshed
+    assert updated_at is None
@@ -0,0 +1,29 @@
+from bot_simple import rarity_classifier
+
+PAGES = [
+    ('Green dragon', 'Dragon bones always dropped\nDragon spear 1/128 drop chance\nSee also'),
+    ('Empty', ''),
+    ('Man', 'Coins 5% chance'),
+    ('Lumbridge', 'A town with no monsters'),
+    ('Goblin', 'Common loot is bones\n\nA loot mention'),
+]
+
+def test_classify_prefers_percent_then_fraction_then_keyword():
+    assert rarity_classifier.classify('Coins 50% drop, rare') == 'Common'
+    assert rarity_classifier.classify('Dragon spear 1/128 drop') == 'Rare'
+    assert rarity_classifier.classify('Very rare drop') == 'Very Rare'
+    assert rarity_classifier.classify('Nothing to see') is None
+
+def test_extract_many_matches_extract_per_page():
+    batch = rarity_classifier.extract_many(PAGES)
+    assert list(batch) == [title for title, _ in PAGES]
+    for title, text in PAGES:
+        assert batch[title] == rarity_classifier.extract(text, title)
+    assert batch['Green dragon']['categories'] == {
+        'Always': ['Dragon bones always dropped'], 'Rare': ['Dragon spear 1/128 drop chance']
+    }
+    assert batch['Empty'] is None
+    assert batch['Lumbridge'] is None
+
+def test_extract_many_empty():
+    assert rarity_classifier.extract_many([]) == {}
@@ -0,0 +1,72 @@
+import threading
+import time
+
+from bot_simple import SearchIndex, SearchSegment
+
+def titles(hits):
+    return [hit.title for hit in hits or []]
+
+def test_newer_segments_supersede_and_removals_hide(tmp_path):
+    index = SearchIndex(str(tmp_path / 'index'), max_age=float('inf'))
+    index.replace(SearchSegment.build([('Goblin', 'A goblin is a weak monster'), ('Cow', 'A cow says moo')],
+                                      built_at=time.time() - 60))
+    index.append(SearchSegment.build([('Goblin', 'A goblin is a wizard now')]))
+    assert titles(index.search('wizard', 3)) == ['Goblin']
+    assert titles(index.search('weak', 3)) == []
+    assert index.document_count() == 2
+
+    index.remove(['Cow'])
+    assert titles(index.search('moo', 3)) == []
+
+    # Reloading keeps both the superseded copy and the removal hidden
+    reloaded = SearchIndex(str(tmp_path / 'index'), max_age=float('inf'))
+    assert reloaded.segment_count() == 2
+    assert reloaded.document_count() == 1
+    assert titles(reloaded.search('goblin', 3)) == ['Goblin']
+    assert titles(reloaded.search('moo', 3)) == []
+
+def test_page_added_after_its_removal_stays_visible(tmp_path):
+    index = SearchIndex(str(tmp_path / 'index'), max_age=float('inf'))
+    index.replace(SearchSegment.build([('Cow', 'A cow says moo')], built_at=time.time() - 60))
+    index.remove(['Cow'])
+    index.append(SearchSegment.build([('Cow', 'The cow was restored, moo')], built_at=time.time() + 1))
+    assert titles(index.search('moo', 3)) == ['Cow']
+
+def test_search_during_rebuild_on_another_thread(tmp_path):
+    index = SearchIndex(str(tmp_path / 'index'), max_age=float('inf'))
+    index.replace(SearchSegment.build([(f"Page {i}", f"dragon text {i}") for i in range(500)]))
+    for i in range(5):
+        index.append(SearchSegment.build([(f"Page {i}", f"dragon edit {i}")]))
+
+    errors = []
+    stop = threading.Event()
+
+    def rebuild():
+        while not stop.is_set():
+            index.replace(SearchSegment.build([(f"Page {i}", f"dragon text {i}") for i in range(800)]))
+
+    rebuilder = threading.Thread(target=rebuild)
+    rebuilder.start()
+    try:
+        deadline = time.monotonic() + 1.0
+        while time.monotonic() < deadline:
+            try:
+                assert index.search('dragon', 4)
+            except Exception as e:
+                errors.append(e)
+    finally:
+        stop.set()
+        rebuilder.join()
+    assert errors == []
+
+def test_delta_updates_dont_scale_with_index_size(tmp_path):
+    index = SearchIndex(str(tmp_path / 'index'), max_age=float('inf'))
+    index.replace(SearchSegment.build([(f"Page {i}", f"text {i}") for i in range(50_000)]))
+
+    started = time.perf_counter()
+    for i in range(20):
+        index.state.apply_removals({f"Page {i}": time.time()}, [f"Page {i}"])
+        index.state.add_segment(SearchSegment.build([(f"Page {1000 + i}", "edited")]))
+    elapsed = time.perf_counter() - started
+    assert index.document_count() == 50_000 - 20
+    assert elapsed < 0.05